@@ -1,223 +1,2323 @@
-import os
+from __future__ import annotations
+
 import time
-from datetime import datetime
-from typing import Optional, List
 
-import feedparser
-from notion_client import Client as NotionClient
-from notion_client.errors import APIResponseError
-from dotenv import load_dotenv
-import requests
-from bs4 import BeautifulSoup
-try:
-    from readability import Document  # type: ignore
-except Exception:
-    Document = None
+# Taken before the other imports so --profile-startup includes them
+_STARTED = time.perf_counter()
+
+import os
+import argparse
+import atexit
+import hashlib
+import importlib
+import json
+import random
+import re
+import signal
+import sqlite3
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Callable, Optional, List, Tuple
+from urllib.parse import parse_qsl, quote_plus, unquote_plus, urljoin, urlsplit, urlunsplit
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    from notion_client import Client as NotionClient
+
+# Heavy dependencies (feedparser, notion_client, requests, bs4, readability, lxml) are
+# imported on first use, so runs that end early never load them
+_modules: dict = {}
+_import_times: dict = {}
+_init_times: dict = {}
+
+
+def _import(name: str):
+    # importlib waits for a module another thread is still initializing; sys.modules would not
+    module = _modules.get(name)
+    if module is None:
+        loaded = name in sys.modules
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        if not loaded:
+            _import_times.setdefault(name, time.perf_counter() - started)
+        _modules[name] = module
+    return module
+
+
+def _optional_import(name: str):
+    try:
+        return _import(name)
+    except Exception:
+        return None
+
+
+_log_context = threading.local()
+
+
+def _log(message: str):
+    # Inside a pipeline item the line joins that item's buffered log, so items running in
+    # parallel still print in feed order; anywhere else it is printed right away
+    lines = getattr(_log_context, "lines", None)
+    if lines is None:
+        print(message)
+    else:
+        lines.append(f"  ↳ {message}")
+
+
+@contextmanager
+def _item_log(lines: Optional[List[str]]):
+    # Routes _log on this thread into lines (None: print directly)
+    previous = getattr(_log_context, "lines", None)
+    _log_context.lines = lines
+    try:
+        yield
+    finally:
+        _log_context.lines = previous
+
+
+@contextmanager
+def _timed_init(label: str):
+    # Client/store construction time for --profile-startup
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _init_times[label] = _init_times.get(label, 0.0) + time.perf_counter() - started
+
+
+def _notion_error():
+    # notion_client's APIResponseError for `except` clauses; evaluated only once an error is raised
+    return _import("notion_client.errors").APIResponseError
+
+
+def isoformat(dt_struct):
+    try:
+        return datetime(*dt_struct[:6]).isoformat()
+    except Exception:
+        return None
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    raw = os.getenv(name)
+    if raw is None or raw.strip() == "":
+        return default
+    return raw.strip().lower() in ("1", "true", "yes")
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+class RateLimiter:
+    # Concurrency cap plus token bucket for one external service
+    def __init__(self, rate: float, concurrency: int):
+        self.rate = rate
+        self.capacity = max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(max(1, concurrency))
+
+    def _take_token(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.slots.acquire()
+        try:
+            self._take_token()
+        except BaseException:
+            self.slots.release()
+            raise
+        return self
+
+    def __exit__(self, *exc):
+        self.slots.release()
+        return False
+
+
+class AdaptiveWindow:
+    # AIMD in-flight window for one service: one more slot per window of successes,
+    # halved when the service pushes back. A Retry-After pauses every sender.
+    def __init__(self, max_window: int):
+        self.max_window = max(1, max_window)
+        self.window = float(self.max_window)
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self.cond = threading.Condition()
+
+    def __enter__(self):
+        with self.cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait > 0:
+                    self.cond.wait(wait)
+                elif self.in_flight >= int(self.window):
+                    self.cond.wait()
+                else:
+                    break
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self.cond:
+            self.in_flight -= 1
+            self.cond.notify_all()
+        return False
+
+    def success(self):
+        with self.cond:
+            self.window = min(float(self.max_window), self.window + 1.0 / self.window)
+            self.cond.notify_all()
+
+    def backoff(self, delay: float, pause: bool):
+        with self.cond:
+            self.window = max(1.0, self.window / 2)
+            if pause:
+                self.resume_at = max(self.resume_at, time.monotonic() + delay)
+
+
+# service -> (requests per second, max in-flight); override with <SERVICE>_RPS / <SERVICE>_CONCURRENCY
+SERVICE_LIMITS = {
+    "notion": (3.0, 3),
+    "openai": (5.0, 4),
+    "fetch": (10.0, 8),
+}
+_limiters: dict = {}
+_limiters_lock = threading.Lock()
+
+
+def _throttle(service: str) -> RateLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(service)
+        if limiter is None:
+            rate, concurrency = SERVICE_LIMITS[service]
+            prefix = service.upper()
+            limiter = RateLimiter(_env_float(f"{prefix}_RPS", rate), _env_int(f"{prefix}_CONCURRENCY", concurrency))
+            _limiters[service] = limiter
+        return limiter
+
+
+_windows: dict = {}
+
+
+def _adaptive_window(service: str) -> AdaptiveWindow:
+    # Starts at the static in-flight cap and adapts below it
+    with _limiters_lock:
+        window = _windows.get(service)
+        if window is None:
+            window = AdaptiveWindow(_env_int(f"{service.upper()}_CONCURRENCY", SERVICE_LIMITS[service][1]))
+            _windows[service] = window
+        return window
+
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36",
+    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+HTML_ACCEPT = "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"
+FEED_ACCEPT = "application/rss+xml, application/xml;q=0.9, */*;q=0.8"
+
+
+def _capped_retry(**kwargs):
+    Retry = _import("urllib3.util.retry").Retry
+
+    class CappedRetry(Retry):
+        # A slow origin's Retry-After must not park a worker for minutes
+        RETRY_AFTER_MAX = 10.0
+
+        def get_retry_after(self, response):
+            value = super().get_retry_after(response)
+            return None if value is None else min(value, self.RETRY_AFTER_MAX)
+
+    return CappedRetry(**kwargs)
+
+
+class HttpTransport:
+    # One keep-alive requests.Session shared by every thread: connections are pooled per
+    # host (HTTP_POOL_HOSTS hosts, HTTP_POOL_SIZE connections each), idempotent GETs are
+    # retried on connection errors and 429/5xx (HTTP_RETRIES, honoring Retry-After).
+    # Timeouts are (HTTP_CONNECT_TIMEOUT, caller's read timeout unless HTTP_READ_TIMEOUT).
+    def __init__(self, retries: int, pool_hosts: int, pool_size: int, connect_timeout: float, read_timeout: float):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        requests = _import("requests")
+        retry = _capped_retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = _import("requests.adapters").HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.headers.update(BROWSER_HEADERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, url: str, *, headers: Optional[dict] = None, timeout: float = 15, span: Optional[dict] = None):
+        resp = self.session.get(
+            url,
+            headers=headers,
+            timeout=(self.connect_timeout, self.read_timeout or timeout),
+            allow_redirects=True,
+        )
+        retries = getattr(getattr(resp.raw, "retries", None), "history", None)
+        if span is not None and retries:
+            span["retries"] += len(retries)
+        return resp
+
+
+_http_instance: Optional[HttpTransport] = None
+_http_lock = threading.Lock()
+
+
+def http_get(url: str, *, headers: Optional[dict] = None, timeout: float = 15, span: Optional[dict] = None):
+    global _http_instance
+    with _http_lock:
+        if _http_instance is None:
+            with _timed_init("http transport"):
+                _http_instance = HttpTransport(
+                    retries=_env_int("HTTP_RETRIES", 2),
+                    pool_hosts=_env_int("HTTP_POOL_HOSTS", 32),
+                    pool_size=_env_int("HTTP_POOL_SIZE", 8),
+                    connect_timeout=_env_float("HTTP_CONNECT_TIMEOUT", 5),
+                    read_timeout=_env_float("HTTP_READ_TIMEOUT", 0),
+                )
+        transport = _http_instance
+    return transport.get(url, headers=headers, timeout=timeout, span=span)
+
+
+class RunMetrics:
+    # Per-stage spans for one run: latency, bytes, retries, cache hits and errors.
+    # Written as JSON (METRICS_JSON) and optionally a Prometheus textfile (METRICS_PROM_FILE).
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.time()
+            self.stages: dict = {}
+            self.counters: dict = {}
+
+    @contextmanager
+    def span(self, stage: str):
+        span = {"bytes": 0, "retries": 0, "cache_hit": False, "error": False}
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException:
+            span["error"] = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                st = self.stages.setdefault(
+                    stage,
+                    {"calls": 0, "errors": 0, "seconds": 0.0, "latencies": [], "bytes": 0, "retries": 0, "cache_hits": 0},
+                )
+                st["calls"] += 1
+                st["errors"] += int(bool(span["error"]))
+                st["seconds"] += elapsed
+                st["latencies"].append(elapsed)
+                st["bytes"] += span["bytes"]
+                st["retries"] += span["retries"]
+                st["cache_hits"] += int(bool(span["cache_hit"]))
+
+    def count(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def summary(self) -> dict:
+        with self.lock:
+            stages = {}
+            for name, st in self.stages.items():
+                lat = sorted(st["latencies"])
+                stages[name] = {
+                    "calls": st["calls"],
+                    "errors": st["errors"],
+                    "seconds": round(st["seconds"], 4),
+                    "p50_ms": round(lat[len(lat) // 2] * 1000, 1),
+                    "p95_ms": round(lat[min(len(lat) - 1, int(len(lat) * 0.95))] * 1000, 1),
+                    "max_ms": round(lat[-1] * 1000, 1),
+                    "bytes": st["bytes"],
+                    "retries": st["retries"],
+                    "cache_hits": st["cache_hits"],
+                }
+            return {
+                "started_at": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                "duration_seconds": round(time.time() - self.started, 3),
+                "counters": dict(self.counters),
+                "stages": stages,
+            }
+
+    def prometheus(self, summary: dict) -> str:
+        lines = [
+            "# HELP geeknews_run_duration_seconds Wall time of the last run.",
+            "# TYPE geeknews_run_duration_seconds gauge",
+            f"geeknews_run_duration_seconds {summary['duration_seconds']}",
+            "# HELP geeknews_run_finished_timestamp_seconds When the last run finished.",
+            "# TYPE geeknews_run_finished_timestamp_seconds gauge",
+            f"geeknews_run_finished_timestamp_seconds {time.time():.0f}",
+        ]
+        for name, value in sorted(summary["counters"].items()):
+            lines.append(f'geeknews_run_count{{name="{name}"}} {value}')
+        metrics = [
+            ("calls", "geeknews_stage_calls", "Spans recorded per stage."),
+            ("errors", "geeknews_stage_errors", "Failed spans per stage."),
+            ("seconds", "geeknews_stage_seconds", "Total time spent per stage."),
+            ("bytes", "geeknews_stage_bytes", "Bytes transferred per stage."),
+            ("retries", "geeknews_stage_retries", "Retries per stage."),
+            ("cache_hits", "geeknews_stage_cache_hits", "Cache hits per stage."),
+        ]
+        for key, metric, help_text in metrics:
+            lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+            for stage, st in sorted(summary["stages"].items()):
+                lines.append(f'{metric}{{stage="{stage}"}} {st[key]}')
+        lines += ["# HELP geeknews_stage_latency_ms Span latency per stage.", "# TYPE geeknews_stage_latency_ms gauge"]
+        for stage, st in sorted(summary["stages"].items()):
+            for q in ("p50", "p95", "max"):
+                lines.append(f'geeknews_stage_latency_ms{{stage="{stage}",quantile="{q}"}} {st[q + "_ms"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        summary = self.summary()
+        targets = [(os.getenv("METRICS_JSON") or _state_path("run_metrics.json"), json.dumps(summary, indent=2))]
+        if os.getenv("METRICS_PROM_FILE"):
+            targets.append((os.getenv("METRICS_PROM_FILE"), self.prometheus(summary)))
+        for path, content in targets:
+            try:
+                # Atomic replace so textfile collectors never read a partial file
+                tmp = path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write(content)
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"[warn] failed to write metrics to {path}: {e}")
+
+
+METRICS = RunMetrics()
+
+
+def _state_path(name: str) -> str:
+    # Local state (indexes, caches) lives in STATE_DIR so CI can cache it between runs
+    state_dir = os.getenv("STATE_DIR") or ".state"
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, name)
+
+
+class LLMCache:
+    # Completed LLM responses on disk, keyed by a hash of (model, mode, lang, prompt).
+    # Entries expire after LLM_CACHE_MAX_AGE_DAYS; beyond LLM_CACHE_MAX_ENTRIES the
+    # least recently used ones are dropped.
+    def __init__(self, path: str, max_entries: int, max_age_days: float):
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self.evict()
+
+    @staticmethod
+    def key(model: str, mode: str, lang: str, prompt: str) -> str:
+        raw = json.dumps([model, mode, lang, prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ? AND created_at >= ?", (key, now - self.max_age)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE llm_cache SET used_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, response, now, now),
+            )
+            self.conn.commit()
+
+    def evict(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.max_age,))
+            self.conn.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN (SELECT key FROM llm_cache ORDER BY used_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+
+_llm_cache_instance: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def _llm_cache() -> Optional[LLMCache]:
+    global _llm_cache_instance
+    if not _env_bool("LLM_CACHE", True):
+        return None
+    with _llm_cache_lock:
+        if _llm_cache_instance is None:
+            try:
+                _llm_cache_instance = LLMCache(
+                    _state_path("llm_cache.sqlite"),
+                    max_entries=_env_int("LLM_CACHE_MAX_ENTRIES", 5000),
+                    max_age_days=_env_float("LLM_CACHE_MAX_AGE_DAYS", 30),
+                )
+            except sqlite3.Error as e:
+                _log(f"[warn] LLM cache unavailable: {e}")
+                return None
+        return _llm_cache_instance
+
+
+def _llm_prompt(title: str, url: str, description: Optional[str], lang: str, mode: str, hint_chars: int = 1200) -> str:
+    content_hint = f"\n본문 요약/발췌: {description[:hint_chars]}" if description else ""
+    if mode == "detailed":
+        return (
+            f"다음 링크의 콘텐츠를 {lang}로 핵심 정리해 주세요.\n"
+            f"- 형식: 4~7개 불릿 포인트, 가능한 한 구체적으로.\n"
+            f"- 불필요한 수식어 최소화, 핵심 내용 위주.\n"
+            f"제목: {title}\n링크: {url}{content_hint}"
+        )
+    if mode == "translate":
+        return (
+            f"다음 링크의 글 주요 내용을 {lang}로 자연스럽게 번역·정리해 주세요.\n"
+            f"- 형식: 문단 중심, 핵심 주제별로 3~6개 문단.\n"
+            f"- 과한 의역은 피하고, 맥락은 유지해서 읽기 쉽게.\n"
+            f"제목: {title}\n링크: {url}{content_hint}"
+        )
+    return (
+        f"다음 링크의 기사 내용을 {lang}로 2~3문장으로 간결히 요약해 주세요.\n"
+        f"제목: {title}\n링크: {url}{content_hint}"
+    )
+
+
+_openai_instance = None
+_openai_lock = threading.Lock()
+
+
+def _openai_client(api_key: str):
+    # One client per process: its HTTP connection pool is reused by every LLM call
+    global _openai_instance
+    with _openai_lock:
+        if _openai_instance is None:
+            # Lazy import to avoid hard dependency if user doesn't set a key
+            with _timed_init("openai client"):
+                _openai_instance = _import("openai").OpenAI(api_key=api_key, timeout=_env_float("OPENAI_TIMEOUT", 60))
+        return _openai_instance
+
+
+def _chat_request(prompt: str, model: str, max_tokens: int, json_mode: bool = False) -> dict:
+    # Chat completion request body, shared by direct calls and batch jobs
+    body: dict = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": "당신은 핵심만 간결히 정리하는 요약 비서입니다."},
+            {"role": "user", "content": prompt},
+        ],
+        "temperature": 0.2,
+        "max_tokens": max_tokens,
+    }
+    if json_mode:
+        body["response_format"] = {"type": "json_object"}
+    return body
+
+
+def _chat_completion(
+    prompt: str,
+    *,
+    lang: str,
+    mode: str,
+    max_tokens: int = 180,
+    json_mode: bool = False,
+    deadline: Optional[float] = None,
+    validate: Optional[Callable[[str], bool]] = None,
+) -> Optional[str]:
+    # deadline (time.monotonic()) skips the call once passed; a call made before it gets the
+    # remaining time as its timeout and no SDK retries, so it cannot run past the deadline.
+    # validate: only responses it accepts are cached (cached ones it rejects count as misses);
+    # the text is returned either way so the caller can fall back.
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+    cache = _llm_cache()
+    cache_key = LLMCache.key(model, mode, lang, prompt) if cache else None
+    with METRICS.span(f"llm.{mode}") as span:
+        if cache and cache_key:
+            cached = cache.get(cache_key)
+            if cached is not None and (validate is None or validate(cached)):
+                span["cache_hit"] = True
+                return cached
+
+        try:
+            client = _openai_client(api_key)
+            with _throttle("openai"):
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        span["skipped"] = True
+                        METRICS.count("llm_deadline_skipped")
+                        return None
+                    client = client.with_options(timeout=remaining, max_retries=0)
+                resp = client.chat.completions.create(**_chat_request(prompt, model, max_tokens, json_mode))
+            text = resp.choices[0].message.content.strip()
+            span["bytes"] = len(prompt.encode("utf-8")) + len(text.encode("utf-8"))
+            usage = getattr(resp, "usage", None)
+            if usage is not None:
+                METRICS.count("llm_prompt_tokens", getattr(usage, "prompt_tokens", 0) or 0)
+                METRICS.count("llm_completion_tokens", getattr(usage, "completion_tokens", 0) or 0)
+        except Exception:
+            span["error"] = True
+            return None
+    if cache and cache_key and text and (validate is None or validate(text)):
+        try:
+            cache.put(cache_key, text)
+        except sqlite3.Error as e:
+            _log(f"[warn] LLM cache write failed: {e}")
+    return text or None
+
+
+def _load_json_state(name: str) -> dict:
+    try:
+        with open(_state_path(name), encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"[warn] state file {name} unreadable, starting fresh: {e}")
+        return {}
+
+
+def _save_json_state(name: str, data: dict):
+    path = _state_path(name)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _entry_published(entry) -> Optional[str]:
+    for key in ("published_parsed", "updated_parsed"):
+        value = entry.get(key) if hasattr(entry, "get") else None
+        if value:
+            return isoformat(value)
+    return None
+
+
+def _entries_after_watermark(entries: list, state: dict) -> Tuple[list, dict]:
+    # Feed entries are newest first; stop at the newest entry seen last run
+    newest_id = state.get("newest_id")
+    newest_published = state.get("newest_published")
+    fresh = []
+    for entry in entries:
+        entry_id = entry.get("id") or entry.get("link")
+        if newest_id and entry_id == newest_id:
+            break
+        published = _entry_published(entry)
+        if newest_published and published and published <= newest_published:
+            continue
+        fresh.append(entry)
+    watermark = {"newest_id": newest_id, "newest_published": newest_published}
+    if entries:
+        head = entries[0]
+        watermark["newest_id"] = head.get("id") or head.get("link") or newest_id
+        published = [p for p in (_entry_published(e) for e in entries) if p]
+        if published:
+            watermark["newest_published"] = max(published + ([newest_published] if newest_published else []))
+    return fresh, watermark
+
+
+def _capped_watermark(kept: list, prior: dict, validators: dict) -> dict:
+    # Watermark covering only the kept entries (newest first) of a feed that was cut short,
+    # so the cut entries are still newer than it next run. Holds no ETag/Last-Modified:
+    # the feed must be fetched in full again.
+    if "scrape_topic_id" in validators:
+        ids = [t for t in (_topic_id(e.get("topic")) for e in kept) if t]
+        return {"scrape_topic_id": max(ids + [prior.get("scrape_topic_id") or 0]) or None}
+    published = [p for p in (_entry_published(e) for e in kept) if p]
+    if prior.get("newest_published"):
+        published.append(prior["newest_published"])
+    return {
+        "newest_id": kept[0].get("id") or kept[0].get("link") or prior.get("newest_id"),
+        "newest_published": max(published) if published else None,
+    }
+
+
+def _summary_strategy() -> str:
+    # truncate: prompt sees the first 1200 chars; mapreduce: long texts are summarized chunk by chunk
+    return (os.getenv("SUMMARY_STRATEGY") or "truncate").lower()
+
+
+def _use_mapreduce(text: Optional[str], mode: str) -> bool:
+    return _summary_strategy() == "mapreduce" and mode != "short" and bool(text) and len(text) > 1200
+
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 bytes per token holds up for both English and Korean (3 bytes/char, ~1 token/char)
+    return max(1, len(text.encode("utf-8")) // 4)
+
+
+def _split_chunks(text: str, chunk_tokens: int) -> List[str]:
+    # Pack whole paragraphs up to the token budget; only oversized paragraphs are cut
+    chunks: List[str] = []
+    current: List[str] = []
+    size = 0
+    for para in [p.strip() for p in text.split("\n\n") if p.strip()]:
+        tokens = _estimate_tokens(para)
+        if tokens > chunk_tokens:
+            step = max(1, len(para) * chunk_tokens // tokens)
+            pieces = [para[i:i + step] for i in range(0, len(para), step)]
+        else:
+            pieces = [para]
+        for piece in pieces:
+            piece_tokens = _estimate_tokens(piece)
+            if current and size + piece_tokens > chunk_tokens:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += piece_tokens
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+def _condense_long_text(title: str, text: str, lang: str) -> Optional[str]:
+    # Map step of map-reduce: per-chunk notes, produced in parallel within the
+    # per-item token (MAPREDUCE_TOKEN_BUDGET) and latency (MAPREDUCE_TIME_BUDGET) budgets
+    chunk_tokens = max(200, _env_int("MAPREDUCE_CHUNK_TOKENS", 1500))
+    chunks = _split_chunks(text, chunk_tokens)
+    if len(chunks) <= 1:
+        return text
+    allowed = max(1, min(_env_int("MAPREDUCE_MAX_CHUNKS", 8), _env_int("MAPREDUCE_TOKEN_BUDGET", 12000) // chunk_tokens))
+    total = len(chunks)
+    if total > allowed:
+        # Spread the budget over the whole article instead of keeping only its head
+        picks = [0] if allowed == 1 else sorted({round(i * (total - 1) / (allowed - 1)) for i in range(allowed)})
+        METRICS.count("mapreduce_chunks_dropped", total - len(picks))
+    else:
+        picks = list(range(total))
+
+    def summarize_chunk(index: int) -> Optional[str]:
+        prompt = (
+            f"다음은 '{title}' 글의 {index + 1}/{total} 부분입니다.\n"
+            f"이 부분의 핵심 내용을 {lang}로 빠짐없이 정리해 주세요. 사실·수치·고유명사는 유지하세요.\n\n"
+            f"{chunks[index]}"
+        )
+        # Chunks still queued or throttled when the budget runs out never reach the model;
+        # a call already in flight is cut off by its request timeout
+        with _item_log(item_lines):
+            return _chat_completion(prompt, lang=lang, mode="map", max_tokens=300, deadline=deadline)
+
+    item_lines = getattr(_log_context, "lines", None)
+    budget = _env_float("MAPREDUCE_TIME_BUDGET", 60)
+    deadline = time.monotonic() + budget
+    pool = ThreadPoolExecutor(max_workers=max(1, min(len(picks), _env_int("MAPREDUCE_CONCURRENCY", 4))))
+    futures = {pool.submit(summarize_chunk, i): i for i in picks}
+    done, pending = wait(futures, timeout=budget)
+    for f in pending:
+        f.cancel()
+    pool.shutdown(wait=False)
+    if pending:
+        METRICS.count("mapreduce_chunks_timed_out", len(pending))
+    notes = []
+    for f in done:
+        try:
+            note = f.result()
+        except Exception as e:
+            METRICS.count("mapreduce_chunks_failed")
+            _log(f"[warn] map step failed for chunk {futures[f] + 1}/{total} of {title}: {e}")
+            continue
+        if note:
+            notes.append((futures[f], note))
+    notes.sort()
+    if not notes:
+        return None
+    return "\n\n".join(f"[{i + 1}/{total}] {note}" for i, note in notes)
+
+
+def summarize_with_openai(title: str, url: str, description: Optional[str] = None, lang: str = "ko", mode: str = "short") -> Optional[str]:
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    if _use_mapreduce(description, mode):
+        notes = _condense_long_text(title, description, lang)
+        if notes:
+            # Reduce step: the usual prompt over the chunk notes instead of the first 1200 chars
+            prompt = _llm_prompt(title, url, notes, lang, mode, hint_chars=len(notes))
+            return _chat_completion(prompt, lang=lang, mode=f"reduce-{mode}", max_tokens=_env_int("MAPREDUCE_REDUCE_MAX_TOKENS", 600))
+    prompt = _llm_prompt(title, url, description, lang, mode)
+    return _chat_completion(prompt, lang=lang, mode=mode)
+
+
+def generate_summary_and_body(
+    title: str,
+    url: str,
+    description: Optional[str],
+    seed_text: Optional[str],
+    lang: str = "ko",
+    mode: str = "translate",
+) -> Tuple[Optional[str], Optional[str]]:
+    # One structured call for both the Summary property and the page body;
+    # falls back to the two separate calls if the response can't be parsed
+    if not os.getenv("OPENAI_API_KEY"):
+        return None, None
+    body_spec = {
+        "translate": "글 주요 내용을 자연스럽게 번역·정리한 3~6개 문단 (문단 사이는 빈 줄, 과한 의역 없이 맥락 유지)",
+        "detailed": "핵심 내용을 정리한 4~7개 불릿 포인트 (한 줄에 하나, '- '로 시작, 가능한 한 구체적으로)",
+    }.get(mode, "2~3문장 요약")
+    feed_hint = f"\n피드 요약: {description[:600]}" if description else ""
+    content_hint = f"\n본문 요약/발췌: {seed_text[:1200]}" if seed_text else ""
+    max_tokens = 360
+    if _use_mapreduce(seed_text, mode):
+        notes = _condense_long_text(title, seed_text, lang)
+        if notes:
+            content_hint = f"\n본문 요약/발췌: {notes}"
+            max_tokens = _env_int("MAPREDUCE_REDUCE_MAX_TOKENS", 600) + 180
+    prompt = (
+        f"다음 링크의 글을 {lang}로 정리해 JSON 객체 하나로만 답해 주세요.\n"
+        f'- "summary": 기사 내용을 2~3문장으로 간결히 요약\n'
+        f'- "body": {body_spec}\n'
+        f"제목: {title}\n링크: {url}{feed_hint}{content_hint}"
+    )
+
+    def parse(raw: str) -> Optional[Tuple[str, str]]:
+        try:
+            data = json.loads(raw)
+            summary, body = data.get("summary"), data.get("body")
+        except (ValueError, AttributeError):
+            return None
+        if isinstance(body, list):
+            body = ("\n\n" if mode == "translate" else "\n").join(str(b) for b in body)
+        if isinstance(summary, str) and isinstance(body, str) and summary.strip() and body.strip():
+            return summary.strip(), body.strip()
+        return None
+
+    # Unusable JSON is never cached, so a rerun asks the model again instead of falling back forever
+    raw = _chat_completion(
+        prompt, lang=lang, mode=f"combined-{mode}", max_tokens=max_tokens, json_mode=True,
+        validate=lambda text: parse(text) is not None,
+    )
+    parsed = parse(raw) if raw else None
+    if parsed:
+        return parsed
+    _log(f"[warn] combined generation unusable, falling back to separate calls: {title}")
+    summary = summarize_with_openai(title, url, description, lang=lang, mode="short")
+    body = summarize_with_openai(title, url, seed_text or summary or description, lang=lang, mode=mode)
+    return summary, body
+
+
+class ArticleCache:
+    # Extracted article text keyed by normalized URL, with the HTTP validators and a
+    # hash of the raw body so unchanged pages skip both the download and the parse.
+    # Within ARTICLE_CACHE_TTL_HOURS entries are served without any request. Each row records
+    # the extractor and text cap it was made with (`variant`); other settings re-extract it.
+    def __init__(self, path: str, ttl_hours: float, max_entries: int, max_age_days: float):
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.max_age = max_age_days * 86400
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, content_hash TEXT, "
+            "text TEXT, fetched_at REAL NOT NULL, checked_at REAL NOT NULL, variant TEXT)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(articles)")}
+        if "variant" not in columns:
+            self.conn.execute("ALTER TABLE articles ADD COLUMN variant TEXT")
+        self.evict()
+
+    @staticmethod
+    def normalize(url: str) -> str:
+        return canonicalize_url(url)
+
+    def get(self, url: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified, content_hash, text, checked_at, variant FROM articles WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, content_hash, text, checked_at, variant = row
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "content_hash": content_hash,
+            "text": text,
+            "fresh": time.time() - checked_at < self.ttl,
+            "variant": variant,
+        }
+
+    def put(
+        self, url: str, *, etag: Optional[str], last_modified: Optional[str], content_hash: str, text: Optional[str], variant: str
+    ):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO articles (url, etag, last_modified, content_hash, text, fetched_at, checked_at, variant) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content_hash, text or "", now, now, variant),
+            )
+            self.conn.commit()
+
+    def touch(self, url: str, *, etag: Optional[str] = None, last_modified: Optional[str] = None):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE articles SET checked_at = ?, etag = COALESCE(?, etag), "
+                "last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                (time.time(), etag, last_modified, url),
+            )
+            self.conn.commit()
+
+    def evict(self):
+        # Age counts from the extraction, not the last revalidation, so no entry lives forever
+        with self.lock:
+            self.conn.execute("DELETE FROM articles WHERE fetched_at < ?", (time.time() - self.max_age,))
+            self.conn.execute(
+                "DELETE FROM articles WHERE url NOT IN (SELECT url FROM articles ORDER BY checked_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.conn.commit()
+
+
+_article_cache_instance: Optional[ArticleCache] = None
+_article_cache_lock = threading.Lock()
+
+
+def _article_cache() -> Optional[ArticleCache]:
+    global _article_cache_instance
+    if not _env_bool("ARTICLE_CACHE", True):
+        return None
+    with _article_cache_lock:
+        if _article_cache_instance is None:
+            try:
+                _article_cache_instance = ArticleCache(
+                    _state_path("article_cache.sqlite"),
+                    ttl_hours=_env_float("ARTICLE_CACHE_TTL_HOURS", 24),
+                    max_entries=_env_int("ARTICLE_CACHE_MAX_ENTRIES", 2000),
+                    max_age_days=_env_float("ARTICLE_CACHE_MAX_AGE_DAYS", 30),
+                )
+            except sqlite3.Error as e:
+                _log(f"[warn] article cache unavailable: {e}")
+                return None
+        return _article_cache_instance
+
+
+def _paragraph_text(el) -> str:
+    return " ".join(t.strip() for t in el.itertext() if t.strip())
+
+
+def _extract_readability(html_text: str, max_chars: int) -> str:
+    doc = _import("readability").Document(html_text)
+    html = doc.summary(html_partial=True)
+    soup = _import("bs4").BeautifulSoup(html, "lxml")
+    return "\n\n".join(p.get_text(" ", strip=True) for p in soup.find_all(["p", "li"]))
+
+
+def _extract_soup(html_text: str, max_chars: int) -> str:
+    soup = _import("bs4").BeautifulSoup(html_text, "lxml")
+    candidates = soup.select("article, main, .post, .content, .entry, #content")
+    if not candidates:
+        candidates = [soup]
+    best = max(candidates, key=lambda el: len(el.get_text(" ", strip=True)))
+    return "\n\n".join(p.get_text(" ", strip=True) for p in best.find_all(["p", "li"]))
+
+
+_FAST_CANDIDATES = (
+    "//article | //main | //*[@id='content']"
+    " | //*[contains(concat(' ', normalize-space(@class), ' '), ' post ')]"
+    " | //*[contains(concat(' ', normalize-space(@class), ' '), ' content ')]"
+    " | //*[contains(concat(' ', normalize-space(@class), ' '), ' entry ')]"
+)
+
+
+def _extract_fast(html_text: str, max_chars: int) -> str:
+    # One lxml tree: pick the container by paragraph count (counted in libxml2,
+    # no text built), then read its paragraphs only until max_chars is reached
+    root = _import("lxml.html").document_fromstring(html_text)
+    _import("lxml.etree").strip_elements(root, "script", "style", "noscript", "template", with_tail=False)
+    candidates = root.xpath(_FAST_CANDIDATES) or [root]
+    best = max(candidates, key=lambda el: el.xpath("count(.//p | .//li)"))
+    parts: List[str] = []
+    size = 0
+    for el in best.iter("p", "li"):
+        text = _paragraph_text(el)
+        if not text:
+            continue
+        parts.append(text)
+        size += len(text) + 2
+        if size >= max_chars:
+            break
+    return "\n\n".join(parts)
+
+
+# ARTICLE_EXTRACTOR picks one; "readability" falls back to "soup" when readability-lxml is missing
+EXTRACTORS = {
+    "readability": _extract_readability,
+    "soup": _extract_soup,
+    "fast": _extract_fast,
+}
+
+
+def _article_text_cap() -> int:
+    cap = _env_int("ARTICLE_MAX_CHARS", 8000)
+    if _summary_strategy() == "mapreduce":
+        # Map-reduce covers the whole article, so keep (much) more of it
+        cap = max(cap, _env_int("MAPREDUCE_MAX_CHARS", 60000))
+    return cap
+
+
+def _extractor_name(engine: Optional[str] = None) -> str:
+    engine = (engine or os.getenv("ARTICLE_EXTRACTOR") or "readability").lower()
+    if engine == "readability" and _optional_import("readability") is None:
+        engine = "soup"
+    return engine
+
+
+def _extract_main_text(html_text: str, engine: Optional[str] = None, max_chars: Optional[int] = None) -> Optional[str]:
+    engine = _extractor_name(engine)
+    extractor = EXTRACTORS.get(engine)
+    if extractor is None:
+        _log(f"[warn] unknown ARTICLE_EXTRACTOR={engine}, using soup")
+        extractor = _extract_soup
+    if max_chars is None:
+        max_chars = _article_text_cap()
+    try:
+        text = (extractor(html_text, max_chars) or "").strip()
+        if len(text) > max_chars:
+            text = text[:max_chars]
+        return text or None
+    except Exception:
+        return None
+
+
+def fetch_main_text(url: str, timeout: int = 20) -> Optional[str]:
+    with METRICS.span("article_fetch") as span:
+        text = _fetch_main_text(url, timeout, span)
+        if text is None:
+            span["error"] = True
+        return text
+
+
+def _fetch_main_text(url: str, timeout: int, span: dict) -> Optional[str]:
+    cache = _article_cache()
+    key = ArticleCache.normalize(url) if cache else url
+    cached = cache.get(key) if cache else None
+    variant = f"{_extractor_name()}:{_article_text_cap()}"
+    stale = cached
+    if cached and cached["variant"] != variant:
+        # Extracted with another engine or text cap: the page has to be downloaded and parsed again
+        cached = None
+    if cached and cached["fresh"]:
+        span["cache_hit"] = True
+        return cached["text"] or None
+
+    headers = {"Accept": HTML_ACCEPT, "Referer": "https://news.hada.io/"}
+    if cached:
+        # Revalidate instead of downloading again
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    try:
+        with _throttle("fetch"):
+            r = http_get(url, headers=headers, timeout=timeout, span=span)
+        if cached and r.status_code == 304:
+            span["cache_hit"] = True
+            cache.touch(key)
+            return cached["text"] or None
+        r.raise_for_status()
+    except Exception:
+        # Stale text beats no text when the origin is down
+        return (stale["text"] or None) if stale else None
+
+    span["bytes"] = len(r.content)
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    content_hash = hashlib.sha256(r.content).hexdigest()
+    if cached and cached["content_hash"] == content_hash:
+        span["cache_hit"] = True
+        cache.touch(key, etag=etag, last_modified=last_modified)
+        return cached["text"] or None
+
+    text = _extract_main_text(r.text)
+    if cache:
+        try:
+            cache.put(key, etag=etag, last_modified=last_modified, content_hash=content_hash, text=text, variant=variant)
+        except sqlite3.Error as e:
+            _log(f"[warn] article cache write failed: {e}")
+    return text
+
+
+def _notion_options() -> dict:
+    # NOTION_BASE_URL points the client at a stand-in API (see scripts/bench_replay.py)
+    options: dict = {"timeout_ms": _env_int("NOTION_TIMEOUT_MS", 60000)}
+    base_url = os.getenv("NOTION_BASE_URL")
+    if base_url:
+        options["base_url"] = base_url.rstrip("/")
+    return options
+
+
+_notion_instance: Optional[NotionClient] = None
+_notion_lock = threading.Lock()
+
+
+def _notion_client(token: str) -> NotionClient:
+    # One client per process so repeated runs (watch mode) reuse its connection pool
+    global _notion_instance
+    with _notion_lock:
+        if _notion_instance is None:
+            with _timed_init("notion client"):
+                _notion_instance = _import("notion_client").Client(auth=token, **_notion_options())
+        return _notion_instance
+
+
+def _db_query(notion: NotionClient, database_id: str, payload: dict):
+    # Handle SDK differences (query vs query_database)
+    if hasattr(notion.databases, "query"):
+        with _throttle("notion"):
+            return notion.databases.query(**{"database_id": database_id, **payload})
+    if hasattr(notion.databases, "query_database"):
+        # older SDKs used positional database_id and body
+        body = {k: v for k, v in payload.items() if k != "page_size" or v is not None}
+        with _throttle("notion"):
+            return notion.databases.query_database(database_id, **body)
+    raise AttributeError("Notion client has no databases.query method")
+
+
+def notion_find_by_url(notion: NotionClient, database_id: str, url: str) -> bool:
+    try:
+        res = _db_query(
+            notion,
+            database_id,
+            {
+                "filter": {"property": "URL", "url": {"equals": url}},
+                "page_size": 1,
+            },
+        )
+        return len(res.get("results", [])) > 0
+    except _notion_error() as e:
+        _log(f"[warn] Notion query failed: {e}")
+        return False
+    except AttributeError as e:
+        _log(f"[warn] Notion SDK too old for query; skip dedup: {e}")
+        return False
+
+
+def _page_url(page: dict) -> Optional[str]:
+    props = page.get("properties", {})
+    if "URL" in props and props["URL"].get("url"):
+        return props["URL"]["url"]
+    return None
+
+
+class ItemStore:
+    # Local system of record (STATE_DIR/items.sqlite): one row per story keyed by canonical
+    # URL with title, source, points, extracted text, generated summary/body, Notion page id
+    # and content status, plus an FTS5 index for --search. Dedup and backfill selection read
+    # it instead of querying Notion. It is rebuilt from Notion when missing: a full scan on
+    # first use (and every DEDUP_FULL_SYNC_DAYS), otherwise only pages edited since the last sync.
+    # content_status: generated (page has a content section), missing, failed, unknown (not checked yet)
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "url TEXT PRIMARY KEY, link TEXT, title TEXT, source TEXT, points INTEGER, "
+            "article_text TEXT, summary TEXT, body TEXT, page_id TEXT, "
+            "content_status TEXT NOT NULL DEFAULT 'unknown', backfill_attempts INTEGER NOT NULL DEFAULT 0, "
+            "created_time TEXT, last_edited TEXT, updated_at REAL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS items_page ON items (page_id)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5("
+                "title, summary, body, article_text, content='items', content_rowid='rowid')"
+            )
+            columns = "title, summary, body, article_text"
+            new_row = "new.rowid, new.title, new.summary, new.body, new.article_text"
+            old_row = "'delete', old.rowid, old.title, old.summary, old.body, old.article_text"
+            add = f"INSERT INTO items_fts (rowid, {columns}) VALUES ({new_row});"
+            remove = f"INSERT INTO items_fts (items_fts, rowid, {columns}) VALUES ({old_row});"
+            self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN {add} END")
+            self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN {remove} END")
+            self.conn.execute(f"CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN {remove} {add} END")
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: search falls back to LIKE
+            self.fts = False
+        self.conn.commit()
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: Optional[str]):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _needs_full_sync(self) -> bool:
+        last_sync, last_full_sync = self._meta("last_sync"), self._meta("last_full_sync")
+        if not last_sync or not last_full_sync:
+            return True
+        try:
+            full_days = float(os.getenv("DEDUP_FULL_SYNC_DAYS", "7"))
+            last_full = datetime.fromisoformat(last_full_sync.replace("Z", "+00:00"))
+        except ValueError:
+            return True
+        return datetime.now(timezone.utc) - last_full > timedelta(days=full_days)
+
+    def sync(self, notion: NotionClient, database_id: str) -> bool:
+        with self.lock:
+            full = self._needs_full_sync()
+            last_sync = self._meta("last_sync")
+        payload: dict = {"page_size": 100}
+        if not full:
+            # Small overlap guards against clock skew and same-minute edits
+            since = datetime.fromisoformat(last_sync.replace("Z", "+00:00")) - timedelta(minutes=5)
+            payload["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since.isoformat()}}
+        started = datetime.now(timezone.utc).isoformat()
+        pages: List[dict] = []
+        newest = last_sync
+        cursor = None
+        try:
+            while True:
+                if cursor:
+                    payload["start_cursor"] = cursor
+                res = _db_query(notion, database_id, payload)
+                for page in res.get("results", []):
+                    url = _page_url(page)
+                    if url and page.get("id"):
+                        pages.append(page)
+                    edited = page.get("last_edited_time")
+                    if edited and (not newest or edited > newest):
+                        newest = edited
+                if not res.get("has_more") or not res.get("next_cursor"):
+                    break
+                cursor = res["next_cursor"]
+        except (_notion_error(), AttributeError) as e:
+            print(f"[warn] item store sync failed, falling back to per-item queries: {e}")
+            return False
+        with self.lock:
+            for page in pages:
+                url = _page_url(page)
+                props = page.get("properties", {})
+                source = ((props.get("Source") or {}).get("select") or {}).get("name")
+                summary = "".join(t.get("plain_text", "") for t in (props.get("Summary") or {}).get("rich_text") or []) or None
+                self.conn.execute(
+                    "INSERT INTO items (url, link, title, source, summary, page_id, created_time, last_edited, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (url) DO UPDATE SET "
+                    "title = excluded.title, source = COALESCE(excluded.source, source), "
+                    "summary = COALESCE(excluded.summary, summary), "
+                    "content_status = CASE WHEN page_id IS excluded.page_id THEN content_status ELSE 'unknown' END, "
+                    "page_id = excluded.page_id, created_time = excluded.created_time, "
+                    "last_edited = excluded.last_edited, updated_at = excluded.updated_at",
+                    (canonicalize_url(url), url, _page_title(page), source, summary, page["id"],
+                     page.get("created_time"), page.get("last_edited_time"), time.time()),
+                )
+            if full:
+                # Pages deleted in Notion no longer count as existing (local text is kept)
+                seen = {page["id"] for page in pages}
+                stale = [
+                    (pid,) for (pid,) in self.conn.execute("SELECT page_id FROM items WHERE page_id IS NOT NULL")
+                    if pid not in seen
+                ]
+                self.conn.executemany("UPDATE items SET page_id = NULL WHERE page_id = ?", stale)
+                self._set_meta("last_full_sync", started)
+            self._set_meta("last_sync", newest or started)
+            self.conn.commit()
+            known = self.conn.execute("SELECT COUNT(*) FROM items WHERE page_id IS NOT NULL").fetchone()[0]
+        print(f"[info] item store: {known} known URLs ({'full' if full else 'incremental'} sync, {len(pages)} fetched)")
+        return True
+
+    def __contains__(self, url: str) -> bool:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM items WHERE url = ? AND page_id IS NOT NULL", (canonicalize_url(url),)
+            ).fetchone()
+        return row is not None
+
+    def page_id(self, url: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT page_id FROM items WHERE url = ?", (canonicalize_url(url),)).fetchone()
+        return row[0] if row else None
+
+    def record_page(self, url: str, payload: dict, page: Optional[dict], **fields):
+        # Stores a page written by this tool; fields: points, article_text, body
+        props = payload.get("properties", {})
+        title = "".join(t["text"]["content"] for t in props.get("Name", {}).get("title", [])) or None
+        summary = "".join(t["text"]["content"] for t in props.get("Summary", {}).get("rich_text", [])) or None
+        source = (props.get("Source", {}).get("select") or {}).get("name")
+        has_content = any(b.get("type") == "heading_2" for b in payload.get("children") or [])
+        row = {
+            "url": canonicalize_url(url),
+            "link": url,
+            "title": title,
+            "source": source,
+            "points": fields.get("points"),
+            "article_text": fields.get("article_text"),
+            "summary": summary,
+            "body": fields.get("body"),
+            "page_id": (page or {}).get("id"),
+            "content_status": "generated" if has_content else "missing",
+            "created_time": (page or {}).get("created_time"),
+            "updated_at": time.time(),
+        }
+        with self.lock:
+            self.conn.execute(
+                f"INSERT INTO items ({', '.join(row)}) VALUES ({', '.join('?' * len(row))}) ON CONFLICT (url) DO UPDATE SET "
+                + ", ".join(f"{k} = COALESCE(excluded.{k}, {k})" for k in row if k != "url"),
+                tuple(row.values()),
+            )
+            self.conn.commit()
+
+    def backfill_candidates(self, status: str, limit: int, max_attempts: int) -> List[dict]:
+        # Pages with the given content status (missing / unknown), oldest first
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT page_id, title, link, backfill_attempts FROM items "
+                "WHERE page_id IS NOT NULL AND link IS NOT NULL AND content_status = ? AND backfill_attempts < ? "
+                "ORDER BY created_time LIMIT ?",
+                (status, max_attempts, limit),
+            ).fetchall()
+        return [{"id": pid, "title": title, "url": link, "attempts": attempts} for pid, title, link, attempts in rows]
+
+    def set_content(self, page_id: str, status: str, body: Optional[str] = None,
+                    article_text: Optional[str] = None, attempt: bool = False):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE items SET content_status = ?, body = COALESCE(?, body), "
+                "article_text = COALESCE(?, article_text), backfill_attempts = backfill_attempts + ?, "
+                "updated_at = ? WHERE page_id = ?",
+                (status, body, article_text, int(attempt), time.time(), page_id),
+            )
+            self.conn.commit()
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        with self.lock:
+            if self.fts:
+                sql = (
+                    "SELECT i.title, i.link, i.source, i.page_id, snippet(items_fts, -1, '[', ']', '…', 12) "
+                    "FROM items_fts JOIN items i ON i.rowid = items_fts.rowid WHERE items_fts MATCH ? "
+                    "ORDER BY bm25(items_fts, 10.0, 4.0, 2.0, 1.0) LIMIT ?"
+                )
+                try:
+                    rows = self.conn.execute(sql, (query, limit)).fetchall()
+                except sqlite3.OperationalError:
+                    # Not valid FTS5 query syntax: search it as one phrase
+                    rows = self.conn.execute(sql, ('"' + query.replace('"', '""') + '"', limit)).fetchall()
+            else:
+                like = f"%{query}%"
+                rows = self.conn.execute(
+                    "SELECT title, link, source, page_id, substr(COALESCE(summary, ''), 1, 120) FROM items "
+                    "WHERE title LIKE ? OR summary LIKE ? OR body LIKE ? OR article_text LIKE ? LIMIT ?",
+                    (like, like, like, like, limit),
+                ).fetchall()
+        return [
+            {"title": title, "url": link, "source": source, "page_id": page_id, "snippet": snippet}
+            for title, link, source, page_id, snippet in rows
+        ]
+
+
+_item_store_instance: Optional[ItemStore] = None
+_item_store_lock = threading.Lock()
+
+
+def _item_store() -> Optional[ItemStore]:
+    global _item_store_instance
+    with _item_store_lock:
+        if _item_store_instance is None:
+            try:
+                with _timed_init("item store"):
+                    _item_store_instance = ItemStore(_state_path("items.sqlite"))
+            except sqlite3.Error as e:
+                print(f"[warn] item store unavailable: {e}")
+                return None
+        return _item_store_instance
+
+
+class SimHashIndex:
+    # 64-bit SimHash fingerprints of title + article text for near-duplicate stories
+    # (mirrors, reposts, topic page vs. original). Fingerprints are split into
+    # NEAR_DUP_DISTANCE + 1 bands: by pigeonhole, any fingerprint within that many
+    # bits matches in at least one band, so lookups only scan a few buckets.
+    def __init__(self, path: str, max_distance: int):
+        self.path = path
+        self.max_distance = max(0, min(max_distance, 15))
+        self.bands = self.max_distance + 1
+        self.band_bits = 64 // self.bands
+        self.items: List[list] = []  # [fingerprint hex, canonical url, title]
+        self.buckets: dict = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(title: str, text: str) -> int:
+        # Title words weigh more; body contributes word 3-shingles
+        title_words = re.findall(r"\w+", title.lower())
+        words = re.findall(r"\w+", text.lower())[:2000]
+        features = [(w, 3) for w in title_words]
+        features += [(" ".join(words[i:i + 3]), 1) for i in range(max(0, len(words) - 2))]
+        weights = [0] * 64
+        for feature, weight in features:
+            h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+            for bit in range(64):
+                weights[bit] += weight if (h >> bit) & 1 else -weight
+        return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+    def _band_keys(self, fp: int):
+        mask = (1 << self.band_bits) - 1
+        return [(b, (fp >> (b * self.band_bits)) & mask) for b in range(self.bands)]
+
+    def _index(self, pos: int, fp: int):
+        for band_key in self._band_keys(fp):
+            self.buckets.setdefault(band_key, []).append(pos)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                items = json.load(f).get("items") or []
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"[warn] near-duplicate index unreadable, rebuilding: {e}")
+            return
+        for item in items:
+            self._index(len(self.items), int(item[0], 16))
+            self.items.append(item)
+
+    def save(self, max_items: int):
+        with self.lock:
+            items = self.items[-max_items:] if max_items > 0 else self.items
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"items": items}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def check(self, fp: int, url: str) -> Optional[dict]:
+        # Closest recorded story within max_distance, if any
+        with self.lock:
+            best = None
+            seen = set()
+            for band_key in self._band_keys(fp):
+                for pos in self.buckets.get(band_key, ()):
+                    if pos in seen:
+                        continue
+                    seen.add(pos)
+                    other_fp, other_url, other_title = self.items[pos]
+                    if other_url == url:
+                        # Same URL (e.g. a retry after a failed write) is not a near-duplicate
+                        continue
+                    distance = bin(fp ^ int(other_fp, 16)).count("1")
+                    if distance <= self.max_distance and (best is None or distance < best["distance"]):
+                        best = {"url": other_url, "title": other_title, "distance": distance}
+            return best
+
+    def add(self, fp: int, url: str, title: str):
+        # Called once the story's page exists (or waits in the outbox), so a story whose
+        # write failed never suppresses its mirrors
+        with self.lock:
+            self._index(len(self.items), fp)
+            self.items.append([f"{fp:016x}", url, title])
+
+
+def _page_content_mode() -> str:
+    page_mode = os.getenv("PAGE_CONTENT_MODE", "translate").lower()  # translate | detailed | short
+    return "translate" if page_mode in ("translate", "translation") else ("detailed" if page_mode == "detailed" else "short")
+
+
+def _content_blocks(text: str, mode: str, heading_mode: Optional[str] = None) -> List[dict]:
+    heading_label = "번역 (KR)" if (heading_mode or mode) == "translate" else "요약 (KR)"
+    blocks = [
+        {
+            "object": "block",
+            "type": "heading_2",
+            "heading_2": {"rich_text": [{"type": "text", "text": {"content": heading_label}}]},
+        }
+    ]
+    # If translate mode, prefer paragraphs; else bullet lines
+    if mode == "translate":
+        for para in [p.strip() for p in (text.split("\n\n") or []) if p.strip()]:
+            blocks.append({
+                "object": "block",
+                "type": "paragraph",
+                "paragraph": {"rich_text": [{"type": "text", "text": {"content": para}}]},
+            })
+    else:
+        for line in [l.strip("- •\t ") for l in (text.splitlines() or []) if l.strip()]:
+            blocks.append({
+                "object": "block",
+                "type": "bulleted_list_item",
+                "bulleted_list_item": {"rich_text": [{"type": "text", "text": {"content": line}}]},
+            })
+    return blocks
+
+
+def build_page_payload(
+    database_id: str,
+    *,
+    title: str,
+    url: str,
+    summary: Optional[str],
+    published_iso: Optional[str],
+    tags: Optional[List[str]],
+    source_label: str = "GeekNews",
+    generated_text: Optional[str] = None,
+    generate_content: bool = True,
+    defer_content: bool = False,
+):
+    properties: dict = {
+        "Name": {"title": [{"text": {"content": title or "Untitled"}}]},
+        "URL": {"url": url},
+        "Source": {"select": {"name": source_label}},
+    }
+    if summary:
+        properties["Summary"] = {"rich_text": [{"text": {"content": summary}}]}
+    if published_iso:
+        properties["Published"] = {"date": {"start": published_iso}}
+    if tags:
+        properties["Tags"] = {"multi_select": [{"name": t} for t in tags[:10]]}
+
+    # Page content blocks (children)
+    children = []
+    # Bookmark to original link
+    if url:
+        children.append({
+            "object": "block",
+            "type": "bookmark",
+            "bookmark": {"url": url},
+        })
+
+    # Detailed KR translation/summary section
+    add_content = os.getenv("ADD_PAGE_CONTENT", "true").lower() in ("1", "true", "yes")
+    # Deferred content is appended later by the batch job
+    if add_content and not defer_content:
+        mode_for_llm = _page_content_mode()
+        if generate_content and not generated_text:
+            seed_text = summary or None
+            if mode_for_llm == "translate":
+                seed_text = fetch_main_text(url) or summary or None
+            generated_text = summarize_with_openai(title or "", url, seed_text, lang=os.getenv("SUMMARY_LANGUAGE", "ko"), mode=mode_for_llm)
+
+        if generated_text:
+            children.extend(_content_blocks(generated_text, mode_for_llm))
+        elif summary:
+            # Fallback to a single paragraph with short summary
+            children.extend(_content_blocks(summary, "translate", heading_mode=mode_for_llm))
+
+    payload: dict = {"parent": {"database_id": database_id}, "properties": properties}
+    if children:
+        payload["children"] = children
+    return payload
+
+
+def _retry_after(e: Exception, attempt: int) -> float:
+    # Retry-After (seconds or HTTP date) when Notion sends one, else exponential backoff
+    value = (getattr(e, "headers", None) or {}).get("retry-after")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            try:
+                return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+            except (TypeError, ValueError):
+                pass
+    return min(60.0, 2.0 ** attempt) * (0.5 + random.random() / 2)
+
+
+def _notion_transport_error(e: Exception) -> bool:
+    # The request may or may not have reached Notion: SDK timeout or an httpx network error
+    if isinstance(e, _import("notion_client.errors").RequestTimeoutError):
+        return True
+    httpx = _optional_import("httpx")
+    return httpx is not None and isinstance(e, httpx.TransportError)
+
+
+def _notion_retryable(e: Exception) -> bool:
+    # Throttling, conflicts, server errors and timeouts/connection errors are transient;
+    # anything else (validation errors, bugs such as TypeError) is not
+    if isinstance(e, _import("notion_client.errors").HTTPResponseError):
+        return e.status in (409, 429) or e.status >= 500
+    return _notion_transport_error(e)
+
+
+def _notion_maybe_written(e: Exception) -> bool:
+    # A create that timed out or got a 5xx may still have been applied
+    status = getattr(e, "status", None)
+    return _notion_transport_error(e) or (isinstance(status, int) and status >= 500)
+
+
+def _page_by_url(notion: NotionClient, database_id: str, url: str) -> Optional[dict]:
+    # Existing page with this URL; query errors propagate so callers never guess
+    res = _db_query(notion, database_id, {"filter": {"property": "URL", "url": {"equals": url}}, "page_size": 1})
+    results = res.get("results", [])
+    return results[0] if results else None
+
+
+def send_page(notion: NotionClient, payload: dict):
+    # Creates one page; transient errors are retried in-process up to NOTION_MAX_RETRIES times.
+    # After a timeout or 5xx the create may have landed, so the URL is looked up before
+    # resending; if that lookup fails the error is raised and the outbox row waits for
+    # the next flush, which checks again. Raises the last error when the write still fails.
+    window = _adaptive_window("notion")
+    retries = _env_int("NOTION_MAX_RETRIES", 4)
+    database_id = payload.get("parent", {}).get("database_id")
+    url = payload.get("properties", {}).get("URL", {}).get("url")
+    with METRICS.span("page_create") as span:
+        attempt = 0
+        while True:
+            try:
+                with window, _throttle("notion"):
+                    page = notion.pages.create(**payload)
+                window.success()
+                return page
+            except Exception as e:
+                if not _notion_retryable(e) or attempt >= retries:
+                    raise
+                delay = _retry_after(e, attempt)
+                attempt += 1
+                span["retries"] += 1
+                window.backoff(delay, pause=getattr(e, "status", None) == 429)
+                if getattr(e, "status", None) != 429:
+                    time.sleep(delay)
+                if _notion_maybe_written(e):
+                    if not (database_id and url):
+                        raise
+                    try:
+                        page = _page_by_url(notion, database_id, url)
+                    except Exception:
+                        raise e
+                    if page is not None:
+                        METRICS.count("page_create_recovered")
+                        return page
+
+
+def notion_create_page(notion: NotionClient, database_id: str, **fields):
+    return send_page(notion, build_page_payload(database_id, **fields))
+
+
+class NotionOutbox:
+    # Fully built page payloads waiting to be written to Notion. Each payload is stored
+    # before the first attempt and removed once the page exists, so generated content
+    # survives throttling and crashes; pending rows are flushed at the start of the next run.
+    # After NOTION_OUTBOX_MAX_ATTEMPTS failed attempts (or a non-retryable error) a row is
+    # kept as dead for inspection instead of being retried. `meta` carries what has to happen
+    # once the page exists (item store fields, a deferred batch request), see _page_written.
+    def __init__(self, path: str, max_attempts: int):
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, payload TEXT NOT NULL, "
+            "attempts INTEGER NOT NULL DEFAULT 0, last_error TEXT, dead INTEGER NOT NULL DEFAULT 0, "
+            "created_at REAL NOT NULL, meta TEXT)"
+        )
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(outbox)")}
+        if "meta" not in columns:
+            self.conn.execute("ALTER TABLE outbox ADD COLUMN meta TEXT")
+        self.conn.commit()
+
+    def put(self, url: str, payload: dict, meta: Optional[dict] = None) -> int:
+        with self.lock:
+            cur = self.conn.execute(
+                "INSERT INTO outbox (url, payload, created_at, meta) VALUES (?, ?, ?, ?)",
+                (url, json.dumps(payload, ensure_ascii=False), time.time(), json.dumps(meta or {}, ensure_ascii=False)),
+            )
+            self.conn.commit()
+            return cur.lastrowid
+
+    def done(self, row_id: int):
+        with self.lock:
+            self.conn.execute("DELETE FROM outbox WHERE id = ?", (row_id,))
+            self.conn.commit()
+
+    def failed(self, row_id: int, error: Exception) -> bool:
+        # Records a failed attempt; returns True while the row will be retried next run
+        with self.lock:
+            row = self.conn.execute("SELECT attempts FROM outbox WHERE id = ?", (row_id,)).fetchone()
+            attempts = (row[0] if row else 0) + 1
+            dead = not _notion_retryable(error) or attempts >= self.max_attempts
+            self.conn.execute(
+                "UPDATE outbox SET attempts = ?, last_error = ?, dead = ? WHERE id = ?",
+                (attempts, str(error)[:1000], int(dead), row_id),
+            )
+            self.conn.commit()
+            return not dead
+
+    def pending(self) -> List[Tuple[int, str, dict, dict]]:
+        with self.lock:
+            rows = self.conn.execute("SELECT id, url, payload, meta FROM outbox WHERE dead = 0 ORDER BY id").fetchall()
+        return [(row_id, url, json.loads(payload), json.loads(meta or "{}")) for row_id, url, payload, meta in rows]
+
+    def dead_count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM outbox WHERE dead = 1").fetchone()[0]
+
+    def dead_urls(self) -> List[str]:
+        with self.lock:
+            return [url for (url,) in self.conn.execute("SELECT DISTINCT url FROM outbox WHERE dead = 1")]
+
+
+def _notion_outbox() -> Optional[NotionOutbox]:
+    if not _env_bool("NOTION_OUTBOX", True):
+        return None
+    try:
+        return NotionOutbox(_state_path("notion_outbox.sqlite"), _env_int("NOTION_OUTBOX_MAX_ATTEMPTS", 10))
+    except sqlite3.Error as e:
+        print(f"[warn] Notion outbox unavailable: {e}")
+        return None
+
+
+def _page_written(store: Optional[ItemStore], url: str, payload: dict, page: Optional[dict], meta: dict):
+    # Bookkeeping once a page exists, whether written right away or from the outbox:
+    # the item store row and, for LLM_BATCH=all, the deferred content request
+    if store is not None:
+        store.record_page(url, payload, page, **(meta.get("record") or {}))
+    deferred = meta.get("deferred")
+    if deferred and page and page.get("id"):
+        _llm_batch_queue().enqueue(page["id"], deferred.get("title"), url, deferred.get("seed_text"), deferred["lang"], deferred["mode"])
+        if store is not None:
+            store.set_content(page["id"], "queued")
+
+
+def flush_outbox(notion: NotionClient, database_id: str, outbox: NotionOutbox, url_index: Optional[ItemStore]) -> List[str]:
+    # Writes pages left over from earlier runs; returns the URLs that were written
+    rows = outbox.pending()
+    if not rows:
+        return []
+    print(f"[info] outbox: {len(rows)} pending page(s) from earlier runs")
+
+    def deliver(row) -> Optional[str]:
+        row_id, url, payload, meta = row
+        # A write that timed out may still have landed; never create the page twice.
+        # The local index only knows pages this process saw succeed, so ask Notion as well.
+        if url_index is not None and url in url_index:
+            # Usually a create that timed out but landed, picked up by the sync just before;
+            # its item fields and deferred content request still have to be recorded
+            outbox.done(row_id)
+            _page_written(store, url, payload, {"id": url_index.page_id(url)}, meta)
+            return None
+        try:
+            landed = _page_by_url(notion, database_id, url)
+        except Exception as e:
+            print(f"[warn] outbox: could not check {url}, keeping it for the next run: {e}")
+            return None
+        if landed is not None:
+            outbox.done(row_id)
+            _page_written(store, url, payload, landed, meta)
+            return None
+        try:
+            page = send_page(notion, payload)
+        except Exception as e:
+            outbox.failed(row_id, e)
+            return None
+        outbox.done(row_id)
+        _page_written(store, url, payload, page, meta)
+        return url
+
+    store = _item_store()
+
+    workers = _env_int("NOTION_CONCURRENCY", SERVICE_LIMITS["notion"][1])
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        written = [url for url in pool.map(deliver, rows) if url]
+    METRICS.count("outbox_flushed", len(written))
+    remaining = len(outbox.pending())
+    dead = outbox.dead_count()
+    print(f"[info] outbox: {len(written)} page(s) written, {remaining} still pending" + (f", {dead} dead" if dead else ""))
+    return written
+
+
+# Source labels for well-known feed hosts; others use the feed title or hostname
+KNOWN_FEED_LABELS = {
+    "news.hada.io": "GeekNews",
+    "news.ycombinator.com": "Hacker News",
+    "hnrss.org": "Hacker News",
+    "lobste.rs": "Lobsters",
+}
+
+# Query parameters that only track the click, never select content
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid", "igshid",
+    "mc_cid", "mc_eid", "_hsenc", "_hsmi", "ref_src", "ref_url",
+}
+# Short generic names that only track on these hosts; elsewhere they can select content
+# (`ref` is a branch or tag on code hosts, `si` a section or index on many sites)
+HOST_TRACKING_PARAMS = {
+    "youtube.com": {"si", "feature"},
+    "youtu.be": {"si", "feature"},
+    "open.spotify.com": {"si"},
+    "producthunt.com": {"ref"},
+}
+# Redirect wrappers: host -> query parameters that carry the real target
+REDIRECT_WRAPPERS = {
+    "google.com": ("url", "q"),
+    "l.facebook.com": ("u",),
+    "lm.facebook.com": ("u",),
+    "l.instagram.com": ("u",),
+    "out.reddit.com": ("url",),
+    "t.umblr.com": ("z",),
+    "youtube.com": ("q",),
+    "href.li": (),
+    "news.url.google.com": ("url",),
+}
+
+
+def _query_segments(query: str) -> List[Tuple[str, str, Optional[str]]]:
+    # (raw segment, decoded name, decoded value or None for a bare `?flag` key)
+    segments = []
+    for raw in query.split("&"):
+        if not raw:
+            continue
+        name, sep, value = raw.partition("=")
+        segments.append((raw, unquote_plus(name), unquote_plus(value) if sep else None))
+    return segments
+
+
+def _is_tracking_param(name: str, host: str) -> bool:
+    name = name.lower()
+    if name.startswith("utm_") or name in TRACKING_PARAMS:
+        return True
+    return any(
+        name in params for known, params in HOST_TRACKING_PARAMS.items()
+        if host == known or host.endswith("." + known)
+    )
+
+
+def clean_url(url: str) -> str:
+    # Unwrap known redirectors, drop tracking params and the fragment; keeps scheme/host as is
+    url = (url or "").strip()
+    for _ in range(3):
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if host.startswith("www."):
+            host = host[4:]
+        if host not in REDIRECT_WRAPPERS:
+            break
+        params = REDIRECT_WRAPPERS[host]
+        target = None
+        if not params and parts.query.startswith("http"):
+            target = parts.query  # href.li/?https://...
+        else:
+            query = dict(parse_qsl(parts.query, keep_blank_values=True))
+            target = next((query[p] for p in params if query.get(p, "").startswith("http")), None)
+        if not target:
+            break
+        url = target
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    # Kept parameters stay byte for byte as they were, bare keys included
+    query = "&".join(raw for raw, name, _ in _query_segments(parts.query) if not _is_tracking_param(name, host))
+    return urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+
+
+def canonicalize_url(url: str) -> str:
+    # Dedup key: clean_url plus https, lowercase host without www./default port,
+    # no trailing slash and sorted query params
+    parts = urlsplit(clean_url(url))
+    host = (parts.hostname or "").lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    scheme = "https" if parts.scheme in ("http", "https", "") else parts.scheme.lower()
+    path = parts.path.rstrip("/")
+    pairs = sorted(
+        ((name, value) for _, name, value in _query_segments(parts.query)),
+        key=lambda kv: (kv[0], kv[1] is not None, kv[1] or ""),
+    )
+    query = "&".join(quote_plus(k) if v is None else f"{quote_plus(k)}={quote_plus(v)}" for k, v in pairs)
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _clean_label(label: Optional[str]) -> Optional[str]:
+    # Labels become Notion select options, which may not contain commas or exceed 100 chars
+    label = " ".join(str(label or "").replace(",", " ").split())
+    return label[:100].rstrip() or None
+
+
+def _feed_label(url: str, title: Optional[str] = None) -> str:
+    host = (urlsplit(url).hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    for known, label in KNOWN_FEED_LABELS.items():
+        if host == known or host.endswith("." + known):
+            return label
+    return _clean_label(title) or host or "Feed"
+
+
+def _rule_list(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    elif not isinstance(value, (list, tuple, set)):
+        value = [value]
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+class FilterRules:
+    # One compiled rule set: all include (or exclude) keywords become a single
+    # case-insensitive regex, domains match the host or any subdomain of it.
+    def __init__(self, include=(), exclude=(), allow_domains=(), deny_domains=(), min_points: int = 0):
+        self.include = self._compile(include)
+        self.exclude = self._compile(exclude)
+        self.allow_domains = {d.lower().lstrip(".") for d in allow_domains}
+        self.deny_domains = {d.lower().lstrip(".") for d in deny_domains}
+        self.min_points = min_points
+
+    @staticmethod
+    def _compile(keywords):
+        # Longest first so overlapping keywords don't shadow each other
+        keywords = sorted(set(keywords), key=len, reverse=True)
+        return re.compile("|".join(re.escape(k) for k in keywords), re.IGNORECASE) if keywords else None
+
+    @staticmethod
+    def _domain_match(host: str, domains: set) -> bool:
+        parts = host.split(".")
+        return any(".".join(parts[i:]) in domains for i in range(len(parts)))
+
+    def check(self, title: Optional[str], description: Optional[str], link: Optional[str], points: Optional[int]) -> Optional[str]:
+        # Returns why the item is rejected, or None when it passes
+        if self.min_points and (points or 0) < self.min_points:
+            return "points"
+        if self.allow_domains or self.deny_domains:
+            host = (urlsplit(clean_url(link or "")).hostname or "").lower()
+            if self.deny_domains and self._domain_match(host, self.deny_domains):
+                return "domain"
+            if self.allow_domains and not self._domain_match(host, self.allow_domains):
+                return "domain"
+        if self.include or self.exclude:
+            hay = (title or "") + " " + (description or "")
+            if self.include and not self.include.search(hay):
+                return "keyword"
+            if self.exclude and self.exclude.search(hay):
+                return "keyword"
+        return None
+
+
+class FilterEngine:
+    # Rules from INCLUDE_KEYWORDS / EXCLUDE_KEYWORDS / ALLOW_DOMAINS / DENY_DOMAINS / MIN_POINTS,
+    # optionally refined per source label in FILTERS_FILE, e.g.
+    #   {"*": {"deny_domains": ["medium.com"]}, "Lobsters": {"include": ["rust", "python"], "min_points": 5}}
+    # A source's include/allow lists and min_points replace the defaults; excludes and denies add up.
+    def __init__(self):
+        base = {
+            "include": _rule_list(os.getenv("INCLUDE_KEYWORDS")),
+            "exclude": _rule_list(os.getenv("EXCLUDE_KEYWORDS")),
+            "allow_domains": _rule_list(os.getenv("ALLOW_DOMAINS")),
+            "deny_domains": _rule_list(os.getenv("DENY_DOMAINS")),
+            "min_points": _env_int("MIN_POINTS", 0),
+        }
+        per_source: dict = {}
+        rules_file = os.getenv("FILTERS_FILE")
+        if rules_file:
+            try:
+                with open(rules_file, encoding="utf-8") as f:
+                    per_source = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[warn] FILTERS_FILE unreadable, using env filters only: {e}")
+            if not isinstance(per_source, dict):
+                print("[warn] FILTERS_FILE must hold a JSON object keyed by source label, using env filters only")
+                per_source = {}
+        for label in [label for label, rules in per_source.items() if rules is not None and not isinstance(rules, dict)]:
+            print(f"[warn] FILTERS_FILE rules for {label!r} are not an object, ignored")
+            del per_source[label]
+        base = self._merge(base, per_source.pop("*", None) or {})
+        self.default = FilterRules(**base)
+        self.sources = {label: FilterRules(**self._merge(base, rules or {})) for label, rules in per_source.items()}
+
+    @staticmethod
+    def _merge(base: dict, rules: dict) -> dict:
+        merged = dict(base)
+        for key in ("include", "allow_domains"):
+            if key in rules:
+                merged[key] = _rule_list(rules[key])
+        for key in ("exclude", "deny_domains"):
+            merged[key] = base[key] + _rule_list(rules.get(key))
+        if "min_points" in rules:
+            try:
+                merged["min_points"] = int(rules["min_points"] or 0)
+            except (TypeError, ValueError):
+                pass
+        return merged
+
+    def check(self, entry, source_label: str) -> Optional[str]:
+        rules = self.sources.get(source_label, self.default)
+        return rules.check(
+            entry.get("title"),
+            entry.get("summary") or entry.get("description"),
+            entry.get("link"),
+            entry.get("points"),
+        )
+
+
+def _feed_configs() -> List[dict]:
+    # FEEDS_FILE: JSON list of {"url": ..., "label": ...} (or plain URL strings).
+    # FEED_URL: one URL or a comma/newline separated list, each optionally "Label=URL".
+    raw: list = []
+    feeds_file = os.getenv("FEEDS_FILE")
+    if feeds_file:
+        try:
+            with open(feeds_file, encoding="utf-8") as f:
+                raw = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[warn] FEEDS_FILE unreadable, using FEED_URL: {e}")
+            raw = []
+        if not isinstance(raw, list):
+            print("[warn] FEEDS_FILE must hold a JSON list of URLs or {\"url\": ...} objects, using FEED_URL")
+            raw = []
+        valid = []
+        for item in raw:
+            if isinstance(item, dict) and isinstance(item.get("url"), str):
+                if item.get("label") is not None and not isinstance(item["label"], str):
+                    print(f"[warn] FEEDS_FILE label for {item['url']} is not a string, ignored")
+                    item = {**item, "label": None}
+                valid.append(item)
+            elif isinstance(item, str):
+                valid.append(item)
+            else:
+                print(f"[warn] FEEDS_FILE entry ignored (need a URL string or an object with a string url): {item!r}")
+        if raw and not valid:
+            print("[warn] FEEDS_FILE has no usable entries, using FEED_URL")
+        raw = valid
+    if not raw:
+        # Treat empty env as unset
+        value = os.getenv("FEED_URL") or "https://news.hada.io/rss"
+        for part in re.split(r"[,\n]+", value):
+            part = part.strip()
+            if not part:
+                continue
+            label = None
+            if "=" in part and not part.lower().startswith("http"):
+                label, part = (x.strip() for x in part.split("=", 1))
+            raw.append({"url": part, "label": label})
+    feeds = []
+    seen = set()
+    for item in raw:
+        feed = {"url": item} if isinstance(item, str) else dict(item)
+        feed["url"] = feed["url"].strip()
+        if not feed["url"] or feed["url"] in seen:
+            continue
+        seen.add(feed["url"])
+        feed["label"] = _clean_label(feed.get("label"))
+        feeds.append(feed)
+    return feeds
+
+
+def _fetch_feed_url(url: str, state: dict, conditional: bool):
+    # Returns (parsed feed or None on 304, response); ([], None) on failure
+    headers = {"Accept": FEED_ACCEPT}
+    if conditional and state.get("url") == url:
+        if state.get("etag"):
+            headers["If-None-Match"] = state["etag"]
+        if state.get("last_modified"):
+            headers["If-Modified-Since"] = state["last_modified"]
+    with METRICS.span("feed_fetch") as span:
+        try:
+            resp = http_get(url, headers=headers, timeout=15, span=span)
+            if resp.status_code == 304:
+                span["cache_hit"] = True
+                return None, resp
+            resp.raise_for_status()
+            span["bytes"] = len(resp.content)
+            f = _import("feedparser").parse(resp.text)
+        except Exception as ex:
+            span["error"] = True
+            print(f"[warn] feed request failed: {ex}")
+            return [], None
+    if getattr(f, "bozo", 0) and getattr(f, "bozo_exception", None):
+        print(f"[warn] feed parse warning: {getattr(f, 'bozo_exception')}")
+    return f, resp
+
+
+def fetch_feed(feed: dict, state: dict, conditional: bool) -> dict:
+    # entries is None when the feed is unchanged since the last run
+    feed_url = feed["url"]
+    result: dict = {"entries": [], "validators": {}, "label": feed.get("label") or _feed_label(feed_url)}
+    candidates = [
+        feed_url,
+        feed_url.rstrip("/") + "/",
+        feed_url.replace("https://", "http://"),
+        feed_url.replace("https://", "http://").rstrip("/") + "/",
+    ]
+    candidates = list(dict.fromkeys(candidates))
+    # Try the variant that worked last time first
+    if state.get("url") in candidates:
+        candidates.remove(state["url"])
+        candidates.insert(0, state["url"])
+    entries: list = []
+    for attempt, u in enumerate(candidates):
+        if attempt:
+            METRICS.count("feed_url_retries")
+        print(f"[info] Fetching feed: {u}")
+        parsed, resp = _fetch_feed_url(u, state, conditional)
+        if parsed is None:
+            result["entries"] = None
+            return result
+        entries = list(getattr(parsed, "entries", []) or [])
+        if entries:
+            if not feed.get("label"):
+                result["label"] = _feed_label(feed_url, (getattr(parsed, "feed", {}) or {}).get("title"))
+            result["validators"] = {
+                "url": u,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            }
+            break
+    if entries and conditional:
+        # Only entries newer than the watermark left by the previous run
+        total = len(entries)
+        entries, watermark = _entries_after_watermark(entries, state)
+        print(f"[info] {result['label']}: {len(entries)} of {total} feed entries are new")
+        result["validators"].update(watermark)
+    elif not entries and _is_scrape_host(feed_url):
+        # Fallback: scrape HTML listing pages back to the last ingested topic
+        entries, topic_id = _scrape_items(state)
+        if topic_id:
+            result["validators"]["scrape_topic_id"] = topic_id
+    result["entries"] = entries
+    return result
+
 
+def _is_scrape_host(url: str) -> bool:
+    scrape_base = os.getenv("SCRAPE_BASE_URL") or "https://news.hada.io"
+    return urlsplit(url).hostname == urlsplit(scrape_base).hostname
 
-def isoformat(dt_struct):
-    try:
-        return datetime(*dt_struct[:6]).isoformat()
-    except Exception:
-        return None
 
+_TOPIC_ID = re.compile(r"topic\?id=(\d+)")
 
-def summarize_with_openai(title: str, url: str, description: Optional[str] = None, lang: str = "ko", mode: str = "short") -> Optional[str]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
 
-    try:
-        # Lazy import to avoid hard dependency if user doesn't set a key
-        from openai import OpenAI
-
-        client = OpenAI(api_key=api_key)
-        content_hint = f"\n본문 요약/발췌: {description[:1200]}" if description else ""
-        if mode == "detailed":
-            prompt = (
-                f"다음 링크의 콘텐츠를 {lang}로 핵심 정리해 주세요.\n"
-                f"- 형식: 4~7개 불릿 포인트, 가능한 한 구체적으로.\n"
-                f"- 불필요한 수식어 최소화, 핵심 내용 위주.\n"
-                f"제목: {title}\n링크: {url}{content_hint}"
-            )
-        elif mode == "translate":
-            prompt = (
-                f"다음 링크의 글 주요 내용을 {lang}로 자연스럽게 번역·정리해 주세요.\n"
-                f"- 형식: 문단 중심, 핵심 주제별로 3~6개 문단.\n"
-                f"- 과한 의역은 피하고, 맥락은 유지해서 읽기 쉽게.\n"
-                f"제목: {title}\n링크: {url}{content_hint}"
-            )
-        else:
-            prompt = (
-                f"다음 링크의 기사 내용을 {lang}로 2~3문장으로 간결히 요약해 주세요.\n"
-                f"제목: {title}\n링크: {url}{content_hint}"
-            )
+def _topic_id(value: Optional[str]) -> Optional[int]:
+    m = _TOPIC_ID.search(value or "")
+    return int(m.group(1)) if m else None
 
-        resp = client.chat.completions.create(
-            model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            messages=[
-                {"role": "system", "content": "당신은 핵심만 간결히 정리하는 요약 비서입니다."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=180,
-        )
-        return resp.choices[0].message.content.strip()
-    except Exception:
-        return None
 
+def _parse_listing(html_text: str, base_url: str) -> List[dict]:
+    # Only the topic_row nodes are read; one lxml parse, no soup tree
+    doc = _import("lxml.html").fromstring(html_text)
+    parsed = []
+    for row in doc.xpath("//div[contains(concat(' ', normalize-space(@class), ' '), ' topic_row ')]"):
+        anchors = row.xpath(".//div[contains(@class, 'topictitle')]//a[@href]")
+        if not anchors:
+            continue
+        a = anchors[0]
+        # points
+        points = None
+        pts = row.xpath(".//div[contains(@class, 'topicinfo')]//span[starts-with(@id, 'tp')]")
+        if pts:
+            try:
+                points = int(pts[0].text_content().strip())
+            except ValueError:
+                points = None
+        # desc snippet
+        desc = row.xpath(".//div[contains(@class, 'topicdesc')]//a")
+        snippet = " ".join(desc[0].text_content().split()) if desc else None
+        # Internal topic id
+        topic_href = next((h for h in row.xpath(".//div[contains(@class, 'topicdesc')]//a/@href") if "topic?id=" in h), None)
+        parsed.append({
+            "title": a.text_content().strip(),
+            "link": a.get("href"),
+            "topic": urljoin(base_url, topic_href) if topic_href else None,
+            "topic_id": _topic_id(topic_href),
+            "points": points,
+            "snippet": snippet or None,
+        })
+    return parsed
 
-def fetch_main_text(url: str, timeout: int = 20) -> Optional[str]:
-    try:
-        r = requests.get(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-                "Referer": "https://news.hada.io/",
-            },
-            timeout=timeout,
-            allow_redirects=True,
-        )
-        r.raise_for_status()
-    except Exception:
-        return None
-    try:
-        if Document is not None:
-            doc = Document(r.text)
-            html = doc.summary(html_partial=True)
-            soup = BeautifulSoup(html, "lxml")
-            text = "\n\n".join(p.get_text(" ", strip=True) for p in soup.find_all(["p", "li"]))
-        else:
-            soup = BeautifulSoup(r.text, "lxml")
-            candidates = soup.select("article, main, .post, .content, .entry, #content")
-            if not candidates:
-                candidates = [soup]
-            best = max(candidates, key=lambda el: len(el.get_text(" ", strip=True)))
-            text = "\n\n".join(p.get_text(" ", strip=True) for p in best.find_all(["p", "li"]))
-        text = (text or "").strip()
-        if len(text) > 8000:
-            text = text[:8000]
-        return text or None
-    except Exception:
-        return None
 
+def scrape_listing(url: str) -> Optional[List[dict]]:
+    # Topics on one listing page; [] for an empty page, None when the page could not be read
+    with METRICS.span("scrape") as span:
+        try:
+            with _throttle("fetch"):
+                r = http_get(url, headers={"Accept": HTML_ACCEPT, "Referer": "https://news.hada.io/"}, timeout=15, span=span)
+            r.raise_for_status()
+            span["bytes"] = len(r.content)
+            return _parse_listing(r.text, url)
+        except Exception as ex:
+            span["error"] = True
+            print(f"[warn] scrape failed for {url}: {ex}")
+            return None
 
-def _db_query(notion: NotionClient, database_id: str, payload: dict):
-    # Handle SDK differences (query vs query_database)
-    if hasattr(notion.databases, "query"):
-        return notion.databases.query(**{"database_id": database_id, **payload})
-    if hasattr(notion.databases, "query_database"):
-        # older SDKs used positional database_id and body
-        body = {k: v for k, v in payload.items() if k != "page_size" or v is not None}
-        return notion.databases.query_database(database_id, **body)
-    raise AttributeError("Notion client has no databases.query method")
 
+def _scrape_topics(scrape_base: str, after_id: Optional[int]) -> Tuple[List[dict], bool]:
+    # Walks /new?page=N newest first, then SCRAPE_CONCURRENCY pages at a time, until a page
+    # reaches the already-ingested topic id (or is empty, or SCRAPE_MAX_PAGES is hit).
+    # Without a watermark only the first page is read. Returns the rows of the pages read
+    # before any failed page and whether a page failed.
+    max_pages = max(1, _env_int("SCRAPE_MAX_PAGES", 10)) if after_id else 1
+    concurrency = max(1, _env_int("SCRAPE_CONCURRENCY", 4))
+    rows: List[dict] = []
+    page = 1
+    with ThreadPoolExecutor(max_workers=min(concurrency, max_pages)) as pool:
+        while page <= max_pages:
+            # The first page alone usually covers a short gap; wider waves after that
+            width = 1 if page == 1 else concurrency
+            wave = list(range(page, min(page + width, max_pages + 1)))
+            listings = list(pool.map(lambda n: scrape_listing(f"{scrape_base}/new?page={n}"), wave))
+            page += len(wave)
+            for listing in listings:
+                if listing is None:
+                    return rows, True
+                if not listing:
+                    return rows, False
+                rows.extend(listing)
+                if after_id and any((r["topic_id"] or 0) <= after_id for r in listing):
+                    return rows, False
+    if after_id:
+        # Deliberate: SCRAPE_MAX_PAGES bounds how far back one run catches up, and the
+        # watermark moves past the skipped topics so later runs do not stall on them
+        print(f"[warn] scrape stopped at SCRAPE_MAX_PAGES={max_pages} before reaching topic {after_id}; older topics skipped")
+    return rows, False
 
-def notion_find_by_url(notion: NotionClient, database_id: str, url: str) -> bool:
-    try:
-        res = _db_query(
-            notion,
-            database_id,
-            {
-                "filter": {"property": "URL", "url": {"equals": url}},
-                "page_size": 1,
-            },
-        )
-        return len(res.get("results", [])) > 0
-    except APIResponseError as e:
-        print(f"[warn] Notion query failed: {e}")
-        return False
-    except AttributeError as e:
-        print(f"[warn] Notion SDK too old for query; skip dedup: {e}")
-        return False
 
+def _scrape_items(state: dict) -> Tuple[List[dict], Optional[int]]:
+    # Returns feed-like items newer than the topic watermark and the new watermark.
+    # At most MAX_ITEMS are taken, oldest first, so a long catch-up continues next run.
+    scrape_base = (os.getenv("SCRAPE_BASE_URL") or "https://news.hada.io").rstrip("/")
+    # The RSS watermark counts too: topics ingested from the feed need not be scraped again
+    after_id = max(state.get("scrape_topic_id") or 0, _topic_id(state.get("newest_id")) or 0) or None
+    items, failed = _scrape_topics(scrape_base, after_id)
+    if not items and not after_id:
+        items = scrape_listing(f"{scrape_base}/") or []
 
-def notion_create_page(
-    notion: NotionClient,
-    database_id: str,
-    *,
-    title: str,
-    url: str,
-    summary: Optional[str],
-    published_iso: Optional[str],
-    tags: Optional[List[str]],
-    source_label: str = "GeekNews",
-):
-    properties: dict = {
-        "Name": {"title": [{"text": {"content": title or "Untitled"}}]},
-        "URL": {"url": url},
-        "Source": {"select": {"name": source_label}},
-    }
-    if summary:
-        properties["Summary"] = {"rich_text": [{"text": {"content": summary}}]}
-    if published_iso:
-        properties["Published"] = {"date": {"start": published_iso}}
-    if tags:
-        properties["Tags"] = {"multi_select": [{"name": t} for t in tags[:10]]}
+    seen: set = set()
+    fresh = []
+    for it in items:
+        tid = it.get("topic_id")
+        if after_id and tid and tid <= after_id:
+            continue
+        key = tid or it["link"]
+        if key in seen:
+            # Pages shift while new topics arrive; the same topic can show up twice
+            continue
+        seen.add(key)
+        fresh.append(it)
+    if after_id:
+        fresh.sort(key=lambda it: it.get("topic_id") or 0)
+        fresh = list(reversed(fresh[: _env_int("MAX_ITEMS", 30)]))
+    ids = [it["topic_id"] for it in fresh if it.get("topic_id")]
+    watermark = max(ids + ([after_id] if after_id else [])) if ids or after_id else None
+    if after_id and failed:
+        # A listing page failed: topics between the watermark and the oldest topic read are
+        # unknown, so the watermark stays put and the next run walks back over the gap
+        # (topics already written are skipped by the URL dedup)
+        print(f"[warn] scrape incomplete; topic watermark kept at {after_id}")
+        watermark = after_id
 
-    # Page content blocks (children)
-    children = []
-    # Bookmark to original link
-    if url:
-        children.append({
-            "object": "block",
-            "type": "bookmark",
-            "bookmark": {"url": url},
-        })
+    # Map to feed-like dicts
+    return [
+        {
+            "title": it["title"],
+            "link": it["link"],
+            "summary": it.get("snippet"),
+            "description": it.get("snippet"),
+            "topic": it.get("topic"),
+            "points": it.get("points"),
+        }
+        for it in fresh
+    ], watermark
 
-    # Detailed KR translation/summary section
-    add_content = os.getenv("ADD_PAGE_CONTENT", "true").lower() in ("1", "true", "yes")
-    page_mode = os.getenv("PAGE_CONTENT_MODE", "translate").lower()  # translate | detailed | short
-    if add_content:
-        generated_text = None
-        mode_for_llm = "translate" if page_mode in ("translate", "translation") else ("detailed" if page_mode == "detailed" else "short")
-        seed_text = summary or None
-        if mode_for_llm == "translate":
-            seed_text = fetch_main_text(url) or summary or None
-        generated_text = summarize_with_openai(title or "", url, seed_text, lang=os.getenv("SUMMARY_LANGUAGE", "ko"), mode=mode_for_llm)
-
-        heading_label = "번역 (KR)" if mode_for_llm == "translate" else "요약 (KR)"
-        if generated_text:
-            children.append({
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {"rich_text": [{"type": "text", "text": {"content": heading_label}}]},
-            })
-            # If translate mode, prefer paragraphs; else bullet lines
-            if mode_for_llm == "translate":
-                for para in [p.strip() for p in (generated_text.split("\n\n") or []) if p.strip()]:
-                    children.append({
-                        "object": "block",
-                        "type": "paragraph",
-                        "paragraph": {"rich_text": [{"type": "text", "text": {"content": para}}]},
-                    })
-            else:
-                for line in [l.strip("- •\t ") for l in (generated_text.splitlines() or []) if l.strip()]:
-                    children.append({
-                        "object": "block",
-                        "type": "bulleted_list_item",
-                        "bulleted_list_item": {"rich_text": [{"type": "text", "text": {"content": line}}]},
-                    })
-        elif summary:
-            # Fallback to a single paragraph with short summary
-            children.append({
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {"rich_text": [{"type": "text", "text": {"content": heading_label}}]},
-            })
-            children.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {"rich_text": [{"type": "text", "text": {"content": summary}}]},
-            })
 
-    return notion.pages.create(parent={"database_id": database_id}, properties=properties, children=children or None)
+def main() -> int:
+    # One import run; returns the number of new feed entries seen
+    METRICS.reset()
+    try:
+        return _import_feed()
+    finally:
+        METRICS.write()
 
 
-def main():
+def watch():
+    # Long-running mode: polls the feeds until SIGINT/SIGTERM, reusing clients and connections.
+    # The interval drops to WATCH_MIN_INTERVAL when a poll finds new entries and grows by
+    # WATCH_BACKOFF after each quiet poll, up to WATCH_MAX_INTERVAL. A signal lets the
+    # current cycle finish (all state is saved at the end of each cycle); a second one aborts.
     load_dotenv()
+    min_interval = max(1.0, _env_float("WATCH_MIN_INTERVAL", 60))
+    max_interval = max(min_interval, _env_float("WATCH_MAX_INTERVAL", 1800))
+    backoff = max(1.0, _env_float("WATCH_BACKOFF", 2.0))
+    state = _load_json_state("watch_state.json")
+    try:
+        interval = min(max_interval, max(min_interval, float(state.get("interval") or min_interval)))
+    except (TypeError, ValueError):
+        interval = min_interval
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        if stop.is_set():
+            raise KeyboardInterrupt
+        print(f"[info] signal {signum} received, stopping after the current cycle")
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    print(f"[info] watch mode: polling every {min_interval:.0f}-{max_interval:.0f}s")
+    while not stop.is_set():
+        try:
+            new_entries = main()
+            if _llm_batch_scope() != "off":
+                run_llm_batches(_notion_client(os.getenv("NOTION_TOKEN")))
+        except Exception as e:
+            print(f"[warn] watch cycle failed: {e}")
+            new_entries = 0
+        interval = min_interval if new_entries else min(max_interval, interval * backoff)
+        _save_json_state("watch_state.json", {
+            "interval": interval,
+            "last_poll": datetime.now(timezone.utc).isoformat(),
+            "new_entries": new_entries,
+        })
+        if stop.is_set():
+            break
+        print(f"[info] next poll in {interval:.0f}s")
+        stop.wait(interval)
+    print("[done] watch stopped")
+
+
+def _import_feed():
+    with _timed_init("dotenv"):
+        load_dotenv()
 
     notion_token = os.getenv("NOTION_TOKEN")
 
@@ -226,15 +2326,12 @@ def main():
             return raw
         s = raw.strip()
         # If it's a full URL, pick the 32-hex id part
-        import re
         m = re.search(r"([0-9a-fA-F]{32})", s.replace("-", ""))
         if m:
             return m.group(1)
         return s
 
     database_id = normalize_db_id(os.getenv("NOTION_DATABASE_ID"))
-    # Treat empty env as unset
-    feed_url = os.getenv("FEED_URL") or "https://news.hada.io/rss"
     summary_lang = os.getenv("SUMMARY_LANGUAGE", "ko")
     max_items = int(os.getenv("MAX_ITEMS", "30"))
 
@@ -242,117 +2339,119 @@ def main():
         print("[error] NOTION_TOKEN 또는 NOTION_DATABASE_ID가 설정되지 않았습니다 (.env 확인)")
         raise SystemExit(1)
 
-    notion = NotionClient(auth=notion_token)
+    conditional = _env_bool("FEED_CONDITIONAL", True)
+    feed_states = _load_json_state("feed_state.json") if conditional else {}
+    feeds = _feed_configs()
 
-    def fetch_items(url: str):
-        try:
-            resp = requests.get(
-                url,
-                headers={
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36",
-                    "Accept": "application/rss+xml, application/xml;q=0.9, */*;q=0.8",
-                },
-                timeout=15,
-                allow_redirects=True,
-            )
-            resp.raise_for_status()
-            f = feedparser.parse(resp.text)
-        except Exception as ex:
-            print(f"[warn] feed request failed: {ex}")
-            return []
-        entries = getattr(f, "entries", []) or []
-        if getattr(f, "bozo", 0) and getattr(f, "bozo_exception", None):
-            print(f"[warn] feed parse warning: {getattr(f, 'bozo_exception')}")
-        return entries
+    def load_feed(feed: dict) -> dict:
+        return fetch_feed(feed, dict(feed_states.get(feed["url"]) or {}), conditional)
 
-    candidates = [
-        feed_url,
-        feed_url.rstrip("/") + "/",
-        feed_url.replace("https://", "http://"),
-        feed_url.replace("https://", "http://").rstrip("/") + "/",
-    ]
+    # All feeds are fetched concurrently; results keep the configured order
+    if len(feeds) > 1:
+        with ThreadPoolExecutor(max_workers=min(len(feeds), max(1, _env_int("FEED_CONCURRENCY", 8)))) as pool:
+            results = list(pool.map(load_feed, feeds))
+    else:
+        results = [load_feed(f) for f in feeds]
+
+    # Filters run first, so rejected entries never reach dedup, fetch or LLM work
+    filters = FilterEngine()
+    filtered: dict = {}
     items = []
-    for u in candidates:
-        print(f"[info] Fetching feed: {u}")
-        items = fetch_items(u)
-        if items:
-            break
-    if not items:
-        # Fallback: scrape HTML pages
-        def scrape(url: str):
-            try:
-                r = requests.get(
-                    url,
-                    headers={
-                        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36",
-                        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                        "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
-                        "Referer": "https://news.hada.io/",
-                    },
-                    timeout=15,
-                    allow_redirects=True,
-                )
-                r.raise_for_status()
-                soup = BeautifulSoup(r.text, "lxml")
-                rows = soup.select("div.topics div.topic_row")
-                parsed = []
-                for row in rows:
-                    a = row.select_one("div.topictitle a[href]")
-                    if not a:
-                        continue
-                    title = a.get_text(strip=True)
-                    link = a.get("href")
-                    # points
-                    points = None
-                    pts = row.select_one("div.topicinfo span[id^='tp']")
-                    if pts:
-                        try:
-                            points = int(pts.get_text(strip=True))
-                        except Exception:
-                            points = None
-                    # desc snippet
-                    desc_a = row.select_one("div.topicdesc a")
-                    snippet = None
-                    if desc_a:
-                        snippet = desc_a.get_text(" ", strip=True)
-                    # Internal topic id
-                    topic_anchor = row.select_one("div.topicdesc a[href*='topic?id=']")
-                    topic_url = None
-                    if topic_anchor:
-                        href = topic_anchor.get("href")
-                        if href and not href.startswith("http"):
-                            topic_url = f"https://news.hada.io/{href.lstrip('/')}"
-                    parsed.append({
-                        "title": title,
-                        "link": link,
-                        "topic": topic_url,
-                        "points": points,
-                        "snippet": snippet,
-                    })
-                return parsed
-            except Exception as ex:
-                print(f"[warn] scrape failed for {url}: {ex}")
-                return []
-
-        items = scrape("https://news.hada.io/new")
-        if not items:
-            items = scrape("https://news.hada.io/")
-
-        # Map to feed-like dicts
-        items = [
-            {
-                "title": it["title"],
-                "link": it["link"],
-                "summary": it.get("snippet"),
-                "description": it.get("snippet"),
-                "topic": it.get("topic"),
-                "points": it.get("points"),
-            }
-            for it in items
-        ]
+    feed_validators: dict = {}
+
+    def cap(feed: dict, label: str, entries: list, limit: int) -> list:
+        # Entries are newest first. On a first run the newest win and the rest are dropped.
+        # A feed resuming from a watermark keeps its oldest entries instead and saves a
+        # watermark only up to them, so a long catch-up continues next run.
+        if len(entries) <= limit:
+            return entries
+        prior = feed_states.get(feed["url"]) or {}
+        if not any(prior.get(k) for k in ("newest_id", "newest_published", "scrape_topic_id")):
+            return entries[:limit]
+        kept = entries[len(entries) - limit:] if limit > 0 else []
+        validators = feed_validators.get(feed["url"])
+        if validators is not None:
+            if kept:
+                feed_validators[feed["url"]] = _capped_watermark(kept, prior, validators)
+            else:
+                feed_validators.pop(feed["url"])
+        print(f"[info] {label}: {len(entries) - len(kept)} newer entries left for the next run")
+        return kept
+
+    groups = []
+    with METRICS.span("filter"):
+        for feed, result in zip(feeds, results):
+            entries = result["entries"]
+            if entries is None:
+                print(f"[info] {result['label']}: not modified since last run")
+                continue
+            if result["validators"]:
+                feed_validators[feed["url"]] = result["validators"]
+            passed = []
+            for entry in cap(feed, result["label"], entries, max_items):
+                reason = filters.check(entry, result["label"])
+                if reason:
+                    filtered[reason] = filtered.get(reason, 0) + 1
+                    continue
+                entry["source_label"] = result["label"]
+                entry["feed_url"] = feed["url"]
+                passed.append(entry)
+            groups.append((feed, result["label"], passed))
+    if filtered:
+        METRICS.count("items_filtered", sum(filtered.values()))
+        reasons = ", ".join(f"{k}: {v}" for k, v in sorted(filtered.items()))
+        print(f"[info] {sum(filtered.values())} items skipped by filters ({reasons})")
+
+    total_cap = _env_int("MAX_ITEMS_TOTAL", 0)
+    for feed, label, passed in groups:
+        if total_cap > 0:
+            passed = cap(feed, label, passed, max(0, total_cap - len(items)))
+        items.extend(passed)
+
+    def finish_without_items():
+        if conditional and feed_validators:
+            for url, validators in feed_validators.items():
+                feed_states[url] = {**(feed_states.get(url) or {}), **validators}
+            _save_json_state("feed_state.json", feed_states)
+        if all(r["entries"] is None for r in results):
+            print("[done] Feed not modified since last run")
+        elif filtered:
+            print("[done] No new feed entries passed the filters")
+        else:
+            print("[done] No new feed entries")
+
+    outbox = _notion_outbox()
+    if not items and not (outbox is not None and outbox.pending()):
+        finish_without_items()
+        return 0
 
-    items = items[:max_items]
-    print(f"[info] {len(items)} items fetched")
+    if items:
+        METRICS.count("items_fetched", len(items))
+        print(f"[info] {len(items)} items fetched")
+
+    notion = _notion_client(notion_token)
+
+    # Every written page is recorded in the local item store; dedup reads it once synced
+    store = _item_store()
+    url_index: Optional[ItemStore] = None
+    if store is not None and _env_bool("DEDUP_INDEX", True):
+        with METRICS.span("dedup_sync") as span:
+            synced = store.sync(notion, database_id)
+            span["error"] = not synced
+        if synced:
+            url_index = store
+
+    # Pages generated by earlier runs but not yet written go first
+    queued: set = set()
+    dead: set = set()
+    if outbox is not None:
+        flush_outbox(notion, database_id, outbox, url_index)
+        queued = {canonicalize_url(url) for _, url, _, _ in outbox.pending()}
+        # A dead row failed for good (e.g. a 400); retrying it each run only adds more dead rows
+        dead = {canonicalize_url(url) for url in outbox.dead_urls()}
+    if not items:
+        finish_without_items()
+        return 0
 
     def get(entry, key, alt_keys=None):
         alt_keys = alt_keys or []
@@ -368,28 +2467,32 @@ def main():
                     return v
             return None
 
-    # Filters
-    include_keywords = [s.strip() for s in os.getenv("INCLUDE_KEYWORDS", "").split(",") if s.strip()]
-    exclude_keywords = [s.strip() for s in os.getenv("EXCLUDE_KEYWORDS", "").split(",") if s.strip()]
-    try:
-        min_points = int(os.getenv("MIN_POINTS", "0"))
-    except ValueError:
-        min_points = 0
-
-    def passes_filters(title: Optional[str], description: Optional[str], points: Optional[int]) -> bool:
-        hay = ((title or "") + " " + (description or "")).lower()
-        if include_keywords:
-            if not any(k.lower() in hay for k in include_keywords):
-                return False
-        if exclude_keywords:
-            if any(k.lower() in hay for k in exclude_keywords):
-                return False
-        if min_points and (points or 0) < min_points:
-            return False
-        return True
+    # LLM_BATCH=all: pages are created right away and their body comes from a batch job later
+    defer_body = _llm_batch_scope() == "all" and _env_bool("ADD_PAGE_CONTENT", True)
+    combined = (
+        _env_bool("COMBINED_GENERATION", True)
+        and _env_bool("ADD_PAGE_CONTENT", True)
+        and bool(os.getenv("OPENAI_API_KEY"))
+        and not defer_body
+    )
+    near_dup_action = (os.getenv("NEAR_DUP") or "skip").lower()
+    near_index: Optional[SimHashIndex] = None
+    if near_dup_action in ("skip", "flag"):
+        near_index = SimHashIndex(_state_path("near_dup_index.json"), _env_int("NEAR_DUP_DISTANCE", 3))
+        near_index.load()
 
-    created = 0
-    for i, entry in enumerate(items, start=1):
+    failures: List[str] = []
+    claimed: set = set()
+    claimed_lock = threading.Lock()
+
+    def process(i: int, entry) -> Tuple[List[str], bool]:
+        # Runs one item end to end; log lines are buffered so output stays in feed order,
+        # including warnings printed via _log by the helpers it calls
+        log: List[str] = []
+        with _item_log(log):
+            return run_item(i, entry, log)
+
+    def run_item(i: int, entry, log: List[str]) -> Tuple[List[str], bool]:
         link = get(entry, "link")
         title = get(entry, "title")
         description = get(entry, "summary", ["description"]) or None
@@ -403,142 +2506,544 @@ def main():
                 tags = None
 
         if not link:
-            continue
+            return log, False
+        link = clean_url(link)
+        key = canonicalize_url(link)
+        source_label = get(entry, "source_label") or "GeekNews"
 
-        print(f"[info] [{i}] {title}")
+        log.append(f"[info] [{i}] {title}")
 
-        # Filters
-        pts = get(entry, "points")
-        if not passes_filters(title, description, pts):
-            print("  ↳ skip by filters")
-            continue
+        # Skip if exists (or already being handled by another worker)
+        with claimed_lock:
+            # The same story from several feeds is only handled once
+            duplicate = key in claimed
+            claimed.add(key)
+        with METRICS.span("dedup_lookup") as span:
+            if duplicate:
+                exists = True
+            elif url_index is not None:
+                exists = link in url_index
+                span["cache_hit"] = True
+            else:
+                exists = notion_find_by_url(notion, database_id, link)
+        if exists:
+            METRICS.count("items_duplicate")
+            log.append("  ↳ already exists, skip")
+            return log, False
+        if key in queued:
+            log.append("  ↳ already queued in outbox, skip")
+            return log, False
+        if key in dead:
+            log.append("  ↳ [warn] failed permanently in an earlier run (dead outbox row), skip")
+            return log, False
 
-        # Skip if exists
-        if notion_find_by_url(notion, database_id, link):
-            print("  ↳ already exists, skip")
-            continue
+        mode_for_llm = _page_content_mode()
+        article_text = None
+        if mode_for_llm == "translate" and (combined or defer_body or near_index is not None):
+            article_text = fetch_main_text(link)
+
+        # Near-duplicate check (same story under another URL) before any LLM work
+        fingerprint = None
+        if near_index is not None:
+            fingerprint = SimHashIndex.fingerprint(title or "", article_text or description or "")
+            with METRICS.span("near_dup_lookup"):
+                match = near_index.check(fingerprint, key)
+            if match:
+                METRICS.count("items_near_duplicate")
+                if near_dup_action == "skip":
+                    log.append(f"  ↳ near-duplicate of \"{match['title']}\" ({match['url']}), skip")
+                    return log, False
+                log.append(f"  ↳ near-duplicate of \"{match['title']}\" ({match['url']})")
+                tags = (tags or []) + ["near-duplicate"]
+                fingerprint = None
 
-        # Summarize (optional): only for property Summary (1-line)
-        short_summary = summarize_with_openai(title or "", link, description, lang=summary_lang, mode="short")
+        body_text = None
+        if combined:
+            # One LLM call for both the Summary property and the page body
+            seed_text = (article_text or description) if mode_for_llm == "translate" else description
+            short_summary, body_text = generate_summary_and_body(
+                title or "", link, description, seed_text, lang=summary_lang, mode=mode_for_llm
+            )
+        else:
+            # Summarize (optional): only for property Summary (1-line)
+            short_summary = summarize_with_openai(title or "", link, description, lang=summary_lang, mode="short")
 
         # Date
         published_iso = isoformat(published) if published else None
 
-        # Create
+        # Create: the payload is stored in the outbox first so generated content is never lost
+        payload = build_page_payload(
+            database_id,
+            title=title or link,
+            url=link,
+            summary=short_summary or (description or None),
+            published_iso=published_iso,
+            tags=tags,
+            source_label=source_label,
+            generated_text=body_text,
+            generate_content=not combined,
+            defer_content=defer_body,
+        )
+        meta: dict = {"record": {"points": get(entry, "points"), "article_text": article_text, "body": body_text}}
+        if defer_body:
+            seed_text = short_summary or description
+            if mode_for_llm == "translate":
+                seed_text = article_text or seed_text
+            meta["deferred"] = {"title": title, "seed_text": seed_text, "lang": summary_lang, "mode": mode_for_llm}
+        row_id = outbox.put(link, payload, meta) if outbox is not None else None
         try:
-            notion_create_page(
-                notion,
-                database_id,
-                title=title or link,
-                url=link,
-                summary=short_summary or (description or None),
-                published_iso=published_iso,
-                tags=tags,
-            )
-            created += 1
-            print("  ↳ Notion page created")
-        except APIResponseError as e:
-            print(f"  ↳ [error] Notion error: {e}")
-            # Basic backoff if rate limited
-            if getattr(e, "status", None) == 429:
-                time.sleep(2)
+            page = send_page(notion, payload)
+        except Exception as e:
+            METRICS.count("pages_failed")
+            if row_id is None:
+                # Nothing durable records the item: keep the feed watermark so it comes back
+                failures.append(get(entry, "feed_url"))
+                log.append(f"  ↳ [error] Notion error: {e}")
+            elif outbox.failed(row_id, e):
+                METRICS.count("pages_queued")
+                if fingerprint is not None:
+                    near_index.add(fingerprint, key, title or "")
+                log.append(f"  ↳ [warn] Notion error: {e}; queued in outbox for the next run")
+            else:
+                # The dead row is the record of the failure; the watermark may move past it
+                log.append(f"  ↳ [error] Notion error: {e}; kept as a dead outbox row")
+            return log, False
+        if row_id is not None:
+            outbox.done(row_id)
+        if fingerprint is not None:
+            near_index.add(fingerprint, key, title or "")
+        _page_written(store, link, payload, page, meta)
+        METRICS.count("pages_created")
+        log.append("  ↳ Notion page created" + (", content queued for the batch job" if defer_body else ""))
+        return log, True
+
+    created = 0
+    workers = _env_int("PIPELINE_WORKERS", 4)
+    if workers > 1 and len(items) > 1:
+        # Items overlap on network waits; per-service limiters keep each API within budget
+        pool = ThreadPoolExecutor(max_workers=workers)
+        results = pool.map(process, range(1, len(items) + 1), items)
+    else:
+        pool = None
+        results = (process(i, entry) for i, entry in enumerate(items, start=1))
+    try:
+        for log, ok in results:
+            for line in log:
+                print(line)
+            created += int(ok)
+    finally:
+        if pool is not None:
+            pool.shutdown()
 
+    if near_index is not None:
+        near_index.save(_env_int("NEAR_DUP_MAX_ITEMS", 50000))
+    if feed_validators and conditional:
+        if failures:
+            # Keep the old watermark so failed entries are picked up again next run
+            print(f"[warn] {len(failures)} items failed; watermark not advanced for {len(set(failures))} feed(s)")
+        for url, validators in feed_validators.items():
+            if url not in failures:
+                feed_states[url] = {**(feed_states.get(url) or {}), **validators}
+        _save_json_state("feed_state.json", feed_states)
+    cache = _llm_cache_instance
+    if cache is not None and (cache.hits or cache.misses):
+        print(f"[info] LLM cache: {cache.hits} hits, {cache.misses} misses")
     print(f"[done] Created {created} new pages")
+    return len(items)
 
 def backfill_page_content(notion: NotionClient, database_id: str, limit: int = 20):
-    # Query recent pages and add content if missing
+    with METRICS.span("backfill"):
+        _backfill_page_content(notion, database_id, limit)
+
+
+def _page_title(page: dict) -> Optional[str]:
+    props = page.get("properties", {})
+    if "Name" in props and props["Name"].get("title"):
+        return props["Name"]["title"][0].get("plain_text")
+    return None
+
+
+def _page_has_generated_content(notion: NotionClient, pid: str) -> bool:
+    with METRICS.span("backfill.blocks_list"), _throttle("notion"):
+        blocks = notion.blocks.children.list(block_id=pid, page_size=20)
+    wanted = "번역" if _page_content_mode() == "translate" else "요약 (KR)"
+    for b in blocks.get("results", []):
+        t = b.get("type")
+        if t == "heading_2":
+            texts = b.get(t, {}).get("rich_text", [])
+            label = "".join([x.get("plain_text", "") for x in texts])
+            if "번역" in label or wanted in label:
+                return True
+    return False
+
+
+def _backfill_one(notion: NotionClient, pid: str, title: Optional[str], url: str) -> Tuple[Optional[str], Optional[str]]:
+    # Generates and appends the content section; returns (generated text, article text) on success
+    mode_for_llm = _page_content_mode()
+    seed_text = None
+    if mode_for_llm == "translate":
+        seed_text = fetch_main_text(url)
+    text = summarize_with_openai(title or "", url, seed_text, lang=os.getenv("SUMMARY_LANGUAGE", "ko"), mode=mode_for_llm)
+    if not text:
+        return None, seed_text
+    children = _content_blocks(text, mode_for_llm)
     try:
-        res = _db_query(
-            notion,
-            database_id,
-            {
-                "page_size": min(100, max(1, limit)),
-                "sorts": [{"timestamp": "last_edited_time", "direction": "descending"}],
-            },
-        )
-    except APIResponseError as e:
-        print(f"[warn] backfill query failed: {e}")
+        with METRICS.span("backfill.append"), _throttle("notion"):
+            notion.blocks.children.append(block_id=pid, children=children)
+        METRICS.count("pages_backfilled")
+        print(f"  ↳ backfilled content for page: {title}")
+        return text, seed_text
+    except _notion_error() as e:
+        print(f"  ↳ [warn] backfill append failed: {e}")
+        return None, seed_text
+
+
+def _backfill_page_content(notion: NotionClient, database_id: str, limit: int):
+    # Candidates come from the local item store (synced incrementally first), oldest first:
+    # pages known to lack content before pages never checked. Each checked or generated page
+    # has its content status stored, so later runs never re-check finished pages; failed
+    # generations are retried on later runs up to BACKFILL_MAX_ATTEMPTS.
+    store = _item_store()
+    if store is None or not store.sync(notion, database_id):
+        print("[warn] backfill skipped: item store unavailable")
         return
-    for page in res.get("results", []):
-        pid = page.get("id")
-        props = page.get("properties", {})
-        title = None
-        if "Name" in props and props["Name"].get("title"):
-            title = props["Name"]["title"][0].get("plain_text")
-        url = None
-        if "URL" in props and props["URL"].get("url"):
-            url = props["URL"]["url"]
-        if not pid or not url:
-            continue
+    max_checks = _env_int("BACKFILL_MAX_CHECKS", 300)
+    max_attempts = _env_int("BACKFILL_MAX_ATTEMPTS", 3)
+    checks = 0
+    generated = 0
+
+    def check(page: dict) -> Optional[bool]:
         try:
-            blocks = notion.blocks.children.list(block_id=pid, page_size=20)
-            has_translation = False
-            for b in blocks.get("results", []):
-                t = b.get("type")
-                if t == "heading_2":
-                    texts = b.get(t, {}).get("rich_text", [])
-                    label = "".join([x.get("plain_text", "") for x in texts])
-                    if "번역" in label:
-                        has_translation = True
-                        break
-            if has_translation:
-                continue
-        except APIResponseError as e:
+            return _page_has_generated_content(notion, page["id"])
+        except _notion_error() as e:
             print(f"[warn] backfill blocks list failed: {e}")
-            continue
+            return None
 
-        # Generate translation content
-        page_mode = os.getenv("PAGE_CONTENT_MODE", "translate").lower()
-        mode_for_llm = "translate" if page_mode in ("translate", "translation") else ("detailed" if page_mode == "detailed" else "short")
-        seed_text = None
-        if mode_for_llm == "translate":
-            seed_text = fetch_main_text(url)
-        text = summarize_with_openai(title or "", url, seed_text, lang=os.getenv("SUMMARY_LANGUAGE", "ko"), mode=mode_for_llm)
-        if not text:
-            continue
-        heading_label = "번역 (KR)" if mode_for_llm == "translate" else "요약 (KR)"
-        children = [
-            {
-                "object": "block",
-                "type": "heading_2",
-                "heading_2": {"rich_text": [{"type": "text", "text": {"content": heading_label}}]},
-            }
-        ]
-        if mode_for_llm == "translate":
-            for para in [p.strip() for p in (text.split("\n\n") or []) if p.strip()]:
-                children.append({
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {"rich_text": [{"type": "text", "text": {"content": para}}]},
-                })
-        else:
-            for line in [l.strip("- •\t ") for l in (text.splitlines() or []) if l.strip()]:
-                children.append({
-                    "object": "block",
-                    "type": "bulleted_list_item",
-                    "bulleted_list_item": {"rich_text": [{"type": "text", "text": {"content": line}}]},
-                })
+    batch = _llm_batch_scope() != "off"
+
+    def generate(page: dict) -> bool:
+        # True when content was appended (or queued for a batch job); only those count
+        # toward the limit, so failed generations don't use up BACKFILL_LIMIT
+        if batch:
+            # Deferred: the content is appended when the batch job's results are collected
+            mode = _page_content_mode()
+            article_text = fetch_main_text(page["url"]) if mode == "translate" else None
+            _llm_batch_queue().enqueue(
+                page["id"], page["title"], page["url"], article_text, os.getenv("SUMMARY_LANGUAGE", "ko"), mode
+            )
+            store.set_content(page["id"], "queued", article_text=article_text)
+            return True
+        text, article_text = _backfill_one(notion, page["id"], page["title"], page["url"])
+        if text:
+            store.set_content(page["id"], "generated", body=text, article_text=article_text)
+            return True
+        store.set_content(page["id"], "missing", article_text=article_text, attempt=True)
+        if page.get("attempts", 0) + 1 >= max_attempts:
+            store.set_content(page["id"], "failed")
+            print(f"  ↳ [warn] giving up on backfill after {max_attempts} attempts: {page['title']}")
+        return False
+
+    with ThreadPoolExecutor(max_workers=max(1, _env_int("BACKFILL_WORKERS", 4))) as pool:
+        # Pages already known to lack content (including earlier failures) go first
+        todo = store.backfill_candidates("missing", limit, max_attempts)
+        generated += sum(pool.map(generate, todo))
+        while generated < limit and checks < max_checks:
+            unknown = store.backfill_candidates("unknown", min(100, max_checks - checks), max_attempts)
+            if not unknown:
+                break
+            checks += len(unknown)
+            results = list(pool.map(check, unknown))
+            missing = []
+            for page, has_content in zip(unknown, results):
+                if has_content:
+                    store.set_content(page["id"], "generated")
+                elif has_content is False:
+                    store.set_content(page["id"], "missing")
+                    missing.append(page)
+            todo = missing[: max(0, limit - generated)]
+            generated += sum(pool.map(generate, todo))
+            if None in results:
+                # Notion is failing; leave the rest for the next run
+                break
+    print(f"[info] backfill: checked {checks} pages, {'queued' if batch else 'generated'} {generated}")
+
+
+def _llm_batch_scope() -> str:
+    # LLM_BATCH: off | backfill (backfill content goes through batch jobs) | all (new pages too)
+    scope = (os.getenv("LLM_BATCH") or "off").lower()
+    return scope if scope in ("backfill", "all") and os.getenv("OPENAI_API_KEY") else "off"
+
+
+def _batch_dir() -> str:
+    # Batch job input/output JSONL files
+    path = _state_path("batches")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+class OpenAIBatchBackend:
+    # OpenAI Batch API: JSONL upload, one batch per run, results within the completion window
+    def submit(self, path: str) -> str:
+        client = _openai_client(os.getenv("OPENAI_API_KEY"))
+        with open(path, "rb") as f:
+            upload = client.files.create(file=f, purpose="batch")
+        batch = client.batches.create(input_file_id=upload.id, endpoint="/v1/chat/completions", completion_window="24h")
+        return batch.id
+
+    def poll(self, batch_id: str) -> Optional[List[dict]]:
+        # None while the batch runs; the result lines once it has ended (possibly partial)
+        client = _openai_client(os.getenv("OPENAI_API_KEY"))
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in ("validating", "in_progress", "finalizing", "cancelling"):
+            return None
+        lines: List[dict] = []
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                text = client.files.content(file_id).text
+                lines.extend(json.loads(line) for line in text.splitlines() if line.strip())
+        if batch.status != "completed":
+            print(f"[warn] LLM batch {batch_id} ended as {batch.status}")
+        return lines
+
+
+class LocalBatchBackend:
+    # Stand-in for tests and local runs: executes the JSONL requests at submit time through
+    # the regular chat endpoint (OPENAI_BASE_URL) and keeps the output file next to the input
+    def submit(self, path: str) -> str:
+        client = _openai_client(os.getenv("OPENAI_API_KEY"))
+        out = []
+        with open(path, encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f if line.strip()]
+        for req in lines:
+            try:
+                with _throttle("openai"):
+                    resp = client.chat.completions.create(**req["body"])
+                out.append({"custom_id": req["custom_id"], "response": {"status_code": 200, "body": resp.model_dump()}})
+            except Exception as e:
+                out.append({"custom_id": req["custom_id"], "response": None, "error": {"message": str(e)}})
+        batch_id = "local-" + os.path.splitext(os.path.basename(path))[0]
+        with open(os.path.splitext(path)[0] + ".output.jsonl", "w", encoding="utf-8") as f:
+            for line in out:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return batch_id
+
+    def poll(self, batch_id: str) -> Optional[List[dict]]:
+        path = os.path.join(_batch_dir(), batch_id[len("local-"):] + ".output.jsonl")
         try:
-            notion.blocks.children.append(block_id=pid, children=children)
-            print(f"  ↳ backfilled content for page: {title}")
-        except APIResponseError as e:
-            print(f"  ↳ [warn] backfill append failed: {e}")
+            with open(path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except FileNotFoundError:
+            return []
+
+
+BATCH_BACKENDS = {
+    "openai": OpenAIBatchBackend,
+    "local": LocalBatchBackend,
+}
+
+
+class LLMBatchQueue:
+    # Deferred page-content generation (STATE_DIR/llm_batch.sqlite). Prompts are queued with
+    # the Notion page they belong to, submitted as one JSONL batch job per run and collected
+    # on a later run; the content is then appended to the page. Results also go into the LLM
+    # cache. Rows: queued -> submitted -> done (or ready when the append must be retried).
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS requests ("
+            "custom_id TEXT PRIMARY KEY, page_id TEXT NOT NULL, title TEXT, mode TEXT NOT NULL, lang TEXT NOT NULL, "
+            "prompt TEXT NOT NULL, body TEXT NOT NULL, batch_id TEXT, status TEXT NOT NULL, result TEXT, created_at REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def enqueue(self, page_id: str, title: Optional[str], url: str, seed_text: Optional[str], lang: str, mode: str):
+        prompt = _llm_prompt(title or "", url, seed_text, lang, mode)
+        body = _chat_request(prompt, os.getenv("OPENAI_MODEL", "gpt-4o-mini"), 180)
+        with self.lock:
+            self.conn.execute(
+                "INSERT INTO requests (custom_id, page_id, title, mode, lang, prompt, body, status, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 'queued', ?)",
+                (hashlib.sha1(f"{page_id}:{time.time()}".encode()).hexdigest()[:20], page_id, title, mode, lang,
+                 prompt, json.dumps(body, ensure_ascii=False), time.time()),
+            )
+            self.conn.commit()
+
+    def rows(self, where: str, *args) -> List[dict]:
+        with self.lock:
+            cur = self.conn.execute(f"SELECT * FROM requests WHERE {where}", args)
+            names = [c[0] for c in cur.description]
+            return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def update(self, custom_ids: List[str], **fields):
+        with self.lock:
+            assignments = ", ".join(f"{k} = ?" for k in fields)
+            self.conn.executemany(
+                f"UPDATE requests SET {assignments} WHERE custom_id = ?",
+                [tuple(fields.values()) + (cid,) for cid in custom_ids],
+            )
+            self.conn.commit()
+
+
+def _batch_result_text(line: dict) -> Optional[str]:
+    response = line.get("response") or {}
+    if line.get("error") or response.get("status_code") != 200:
+        return None
+    try:
+        return response["body"]["choices"][0]["message"]["content"].strip() or None
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+def run_llm_batches(notion: NotionClient):
+    # Collects finished batch jobs (appending their content to the waiting pages), then
+    # submits everything queued since as one new job through LLM_BATCH_BACKEND
+    backend_cls = BATCH_BACKENDS.get((os.getenv("LLM_BATCH_BACKEND") or "openai").lower())
+    if backend_cls is None:
+        print(f"[warn] unknown LLM_BATCH_BACKEND, known: {', '.join(BATCH_BACKENDS)}")
+        return
+    backend = backend_cls()
+    queue = _llm_batch_queue()
+    store = _item_store()
+    cache = _llm_cache()
+
+    with METRICS.span("llm_batch.collect"):
+        for batch_id in sorted({r["batch_id"] for r in queue.rows("status = 'submitted'")}):
+            try:
+                lines = backend.poll(batch_id)
+            except Exception as e:
+                print(f"[warn] LLM batch {batch_id} poll failed: {e}")
+                continue
+            if lines is None:
+                print(f"[info] LLM batch {batch_id} still running")
+                continue
+            results = {line.get("custom_id"): _batch_result_text(line) for line in lines}
+            pending = queue.rows("batch_id = ? AND status = 'submitted'", batch_id)
+            for row in pending:
+                text = results.get(row["custom_id"])
+                if text:
+                    queue.update([row["custom_id"]], status="ready", result=text)
+                    if cache:
+                        cache.put(LLMCache.key(json.loads(row["body"])["model"], row["mode"], row["lang"], row["prompt"]), text)
+                else:
+                    # Lost or failed requests go back to the page's backfill attempts
+                    queue.update([row["custom_id"]], status="failed")
+                    if store is not None:
+                        store.set_content(row["page_id"], "missing", attempt=True)
+            METRICS.count("llm_batch_results", sum(1 for r in pending if results.get(r["custom_id"])))
+
+        appended = 0
+        for row in queue.rows("status = 'ready'"):
+            try:
+                with METRICS.span("backfill.append"), _throttle("notion"):
+                    notion.blocks.children.append(block_id=row["page_id"], children=_content_blocks(row["result"], row["mode"]))
+            except _notion_error() as e:
+                print(f"  ↳ [warn] batch content append failed, retrying next run: {e}")
+                continue
+            queue.update([row["custom_id"]], status="done")
+            if store is not None:
+                store.set_content(row["page_id"], "generated", body=row["result"])
+            appended += 1
+        if appended:
+            METRICS.count("pages_backfilled", appended)
+            print(f"[info] LLM batch: appended content to {appended} pages")
+
+    queued = queue.rows("status = 'queued'")
+    if not queued:
+        return
+    path = os.path.join(_batch_dir(), f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{queued[0]['custom_id'][:8]}.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for row in queued:
+            line = {"custom_id": row["custom_id"], "method": "POST", "url": "/v1/chat/completions", "body": json.loads(row["body"])}
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+    with METRICS.span("llm_batch.submit") as span:
+        try:
+            batch_id = backend.submit(path)
+        except Exception as e:
+            span["error"] = True
+            print(f"[warn] LLM batch submit failed, will retry next run: {e}")
+            return
+    queue.update([row["custom_id"] for row in queued], status="submitted", batch_id=batch_id)
+    print(f"[info] LLM batch {batch_id}: submitted {len(queued)} requests")
+
+
+_llm_batch_queue_instance: Optional[LLMBatchQueue] = None
+_llm_batch_queue_lock = threading.Lock()
+
+
+def _llm_batch_queue() -> LLMBatchQueue:
+    global _llm_batch_queue_instance
+    with _llm_batch_queue_lock:
+        if _llm_batch_queue_instance is None:
+            _llm_batch_queue_instance = LLMBatchQueue(_state_path("llm_batch.sqlite"))
+        return _llm_batch_queue_instance
+
+
+def print_startup_profile():
+    # --profile-startup: where the time before (and around) useful work went
+    print("[profile] startup")
+    print(f"  {'module load':<28} {(_MODULE_LOADED - _STARTED) * 1000:9.1f} ms")
+    for name, secs in sorted(_import_times.items(), key=lambda kv: -kv[1]):
+        print(f"  {'import ' + name:<28} {secs * 1000:9.1f} ms")
+    for label, secs in sorted(_init_times.items(), key=lambda kv: -kv[1]):
+        print(f"  {'init ' + label:<28} {secs * 1000:9.1f} ms")
+    if not _import_times:
+        print("  (no heavy dependency was imported)")
+    print(f"  {'total':<28} {(time.perf_counter() - _STARTED) * 1000:9.1f} ms")
+
+
+def search_items(query: str, limit: int):
+    load_dotenv()
+    store = _item_store()
+    if store is None:
+        raise SystemExit(1)
+    results = store.search(query, limit)
+    for item in results:
+        print(f"{item['title']}  [{item['source'] or '-'}]")
+        print(f"  {item['url']}")
+        if item["snippet"]:
+            print(f"  {' '.join(item['snippet'].split())}")
+    print(f"[done] {len(results)} matches")
+
+
+_MODULE_LOADED = time.perf_counter()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import GeekNews (and other feeds) into a Notion database")
+    parser.add_argument("--watch", action="store_true", help="keep running and poll the feeds on an adaptive interval")
+    parser.add_argument("--search", metavar="QUERY", help="full-text search of the local item store, then exit")
+    parser.add_argument("--limit", type=int, default=20, help="max --search results")
+    parser.add_argument("--profile-startup", action="store_true", help="report import and init times on exit")
+    args = parser.parse_args()
+    if args.profile_startup:
+        atexit.register(print_startup_profile)
+    if args.search:
+        search_items(args.search, args.limit)
+        raise SystemExit(0)
+    if args.watch:
+        watch()
+        raise SystemExit(0)
     main()
     # Optional backfill for existing pages
     try:
         if os.getenv("BACKFILL_EXISTING", "false").lower() in ("1", "true", "yes"):
             limit = int(os.getenv("BACKFILL_LIMIT", "20"))
-            notion = NotionClient(auth=os.getenv("NOTION_TOKEN"))
+            notion = _notion_client(os.getenv("NOTION_TOKEN"))
             dbid = os.getenv("NOTION_DATABASE_ID")
             # normalize
-            import re
             m = re.search(r"([0-9a-fA-F]{32})", (dbid or "").replace("-", ""))
             if m:
                 dbid = m.group(1)
             if notion and dbid:
                 backfill_page_content(notion, dbid, limit)
+                METRICS.write()
     except Exception:
         pass
+    # Deferred generation: collect finished batch jobs, submit what was queued this run
+    try:
+        if _llm_batch_scope() != "off":
+            run_llm_batches(_notion_client(os.getenv("NOTION_TOKEN")))
+            METRICS.write()
+    except Exception as e:
+        print(f"[warn] LLM batch step failed: {e}")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""Benchmark article text extractors over a saved corpus of article HTML.
+
+Usage:
+  # Save pages into the corpus (explicit URLs, or the links of the current feed)
+  python scripts/bench_extract.py --save https://example.com/post ...
+  python scripts/bench_extract.py --from-feed 30
+
+  # Compare engines against the baseline (default: readability)
+  python scripts/bench_extract.py --engines readability,soup,fast --repeat 5
+
+For every engine the report shows the total/median extraction time per page,
+the speedup against the baseline and how much of the baseline's text the
+engine recovered (word overlap), so a faster engine can't silently lose content.
+"""
+import argparse
+import hashlib
+import os
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import geeknews_to_notion as gn  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_corpus")
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+}
+
+
+def save_pages(urls, corpus):
+    import requests
+
+    os.makedirs(corpus, exist_ok=True)
+    for url in urls:
+        try:
+            r = requests.get(url, headers=HEADERS, timeout=20, allow_redirects=True)
+            r.raise_for_status()
+        except Exception as e:
+            print(f"[warn] skip {url}: {e}")
+            continue
+        if "html" not in r.headers.get("Content-Type", "html"):
+            print(f"[warn] skip {url}: not HTML")
+            continue
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+        with open(os.path.join(corpus, name), "w", encoding="utf-8") as f:
+            # Keep the source URL with the page so the corpus stays reviewable
+            f.write(f"<!-- source: {url} -->\n")
+            f.write(r.text)
+        print(f"[info] saved {url} -> {name}")
+
+
+def feed_links(n):
+    import feedparser
+    import requests
+
+    feed_url = os.getenv("FEED_URL") or "https://news.hada.io/rss"
+    r = requests.get(feed_url, headers=HEADERS, timeout=15)
+    r.raise_for_status()
+    return [e.get("link") for e in feedparser.parse(r.text).entries[:n] if e.get("link")]
+
+
+def load_corpus(corpus):
+    pages = []
+    for name in sorted(os.listdir(corpus)) if os.path.isdir(corpus) else []:
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(corpus, name), encoding="utf-8", errors="replace") as f:
+                pages.append((name, f.read()))
+    return pages
+
+
+def words(text):
+    return set(re.findall(r"\w+", (text or "").lower()))
+
+
+def time_engine(engine, html, repeat, max_chars):
+    timings = []
+    text = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = gn._extract_main_text(html, engine, max_chars=max_chars)
+        timings.append(time.perf_counter() - started)
+    return min(timings), text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--engines", default=",".join(gn.EXTRACTORS))
+    parser.add_argument("--baseline", default="readability")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-chars", type=int, default=8000)
+    parser.add_argument("--save", nargs="+", metavar="URL")
+    parser.add_argument("--from-feed", type=int, metavar="N")
+    parser.add_argument("-v", "--verbose", action="store_true", help="per-page results")
+    args = parser.parse_args()
+
+    if args.save or args.from_feed:
+        save_pages((args.save or []) + (feed_links(args.from_feed) if args.from_feed else []), args.corpus)
+        return
+
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"[error] no .html files in {args.corpus}; add some with --save or --from-feed")
+        raise SystemExit(1)
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    if args.baseline not in engines:
+        engines.insert(0, args.baseline)
+
+    times = {e: [] for e in engines}
+    overlap = {e: [] for e in engines}
+    for name, html in pages:
+        results = {e: time_engine(e, html, args.repeat, args.max_chars) for e in engines}
+        base_words = words(results[args.baseline][1])
+        for e, (elapsed, text) in results.items():
+            times[e].append(elapsed)
+            got = words(text)
+            overlap[e].append(len(got & base_words) / len(base_words) if base_words else (1.0 if not got else 0.0))
+        if args.verbose:
+            cols = "  ".join(f"{e}={results[e][0] * 1000:.1f}ms/{len(results[e][1] or '')}ch" for e in engines)
+            print(f"{name}: {cols}")
+
+    base_total = sum(times[args.baseline])
+    print(f"{len(pages)} pages, best of {args.repeat} runs, max_chars={args.max_chars}")
+    print(f"{'engine':<12} {'total ms':>9} {'median ms':>10} {'speedup':>8} {'overlap':>8}")
+    for e in engines:
+        total = sum(times[e])
+        print(
+            f"{e:<12} {total * 1000:>9.1f} {statistics.median(times[e]) * 1000:>10.2f} "
+            f"{(base_total / total if total else 0):>7.2f}x {statistics.mean(overlap[e]):>7.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
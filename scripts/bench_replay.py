@@ -0,0 +1,411 @@
+#!/usr/bin/env python
+"""Offline end-to-end benchmark of geeknews_to_notion.main().
+
+Starts one local HTTP server that stands in for every external service the
+importer talks to, points the importer at it through its environment, and
+replays N feed items through the full pipeline:
+
+  feed      /rss                      Atom feed with N entries (403 with --scrape)
+  scrape    /new?page=N, /            GeekNews-style topic listing, 20 topics per page
+  article   /article/<i>              article HTML of --article-kb
+  notion    /v1/databases/.../query,  /v1/pages, /v1/blocks/<id>/children
+  openai    /v1/chat/completions
+
+Each service gets its own latency, jitter and 429 rate, e.g.
+
+  python scripts/bench_replay.py --items 30 --latency notion=0.35,openai=1.2,article=0.25 \\
+      --rate-429 notion=0.05 --runs 3
+
+The report shows end-to-end wall time per run, per service the request
+count, 429s served, bytes sent and request throughput, and the importer's
+own per-stage timings from run_metrics.json. Runs start from an
+empty state directory unless --warm is given (to measure cache effects).
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+SERVICES = ("feed", "scrape", "article", "notion", "openai")
+LISTING_PAGE_SIZE = 20
+DEFAULT_LATENCY = "feed=0.05,scrape=0.1,article=0.2,notion=0.3,openai=0.8"
+WORDS = "the of and to in is that for it as with was on be by this are from at or an have not".split()
+
+
+def parse_service_map(raw, default):
+    values = {s: default for s in SERVICES}
+    for part in (raw or "").split(","):
+        if "=" in part:
+            key, value = part.split("=", 1)
+            if key.strip() not in values:
+                raise SystemExit(f"unknown service {key!r}; expected one of {', '.join(SERVICES)}")
+            values[key.strip()] = float(value)
+    return values
+
+
+def filler(n_chars, seed):
+    rng = random.Random(seed)
+    out, size = [], 0
+    while size < n_chars:
+        word = rng.choice(WORDS)
+        out.append(word)
+        size += len(word) + 1
+    return " ".join(out)
+
+
+class StandIn:
+    def __init__(self, args):
+        self.args = args
+        # Services left out of --latency keep their defaults
+        self.latency = parse_service_map(f"{DEFAULT_LATENCY},{args.latency}", 0.0)
+        self.rate_429 = parse_service_map(args.rate_429, 0.0)
+        self.lock = threading.Lock()
+        self.rng = random.Random(args.seed)
+        self.pages = []  # Notion pages in creation order
+        self.blocks = {}
+        self.stats = {}
+        self.reset_stats()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def reset_stats(self):
+        self.stats = {s: {"requests": 0, "429": 0, "bytes": 0, "busy": 0.0} for s in SERVICES}
+
+    def reset_notion(self):
+        with self.lock:
+            self.pages = []
+            self.blocks = {}
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+
+    # --- payloads -------------------------------------------------------
+
+    def feed(self):
+        now = datetime.now(timezone.utc)
+        entries = []
+        for i in range(self.args.items, 0, -1):
+            entries.append(
+                f"<entry><id>tag:bench,{i}</id><title>Benchmark story {i}</title>"
+                f'<link href="{self.base}/article/{i}"/>'
+                f"<updated>{now.strftime('%Y-%m-%dT%H:%M:%SZ')}</updated>"
+                f"<content>{filler(300, i)}</content></entry>"
+            )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>bench</title><id>{self.base}/rss</id>{''.join(entries)}</feed>"
+        )
+
+    def listing(self, page=1):
+        rows = []
+        top = self.args.items - (page - 1) * LISTING_PAGE_SIZE
+        for i in range(top, max(0, top - LISTING_PAGE_SIZE), -1):
+            rows.append(
+                f'<div class="topic_row"><div class="topictitle"><a href="{self.base}/article/{i}">Benchmark story {i}</a></div>'
+                f'<div class="topicdesc"><a href="topic?id={i}">{filler(200, i)}</a></div>'
+                f'<div class="topicinfo"><span id="tp{i}">{i}</span></div></div>'
+            )
+        return f'<html><body><div class="topics">{"".join(rows)}</div></body></html>'
+
+    def article(self, i):
+        para_size = 600
+        n = max(1, int(self.args.article_kb * 1024 / para_size))
+        paras = "".join(f"<p>{filler(para_size, i * 1000 + k)}</p>" for k in range(n))
+        nav = "".join(f"<li><a href='/x{k}'>menu {k}</a></li>" for k in range(40))
+        return (
+            f"<html><head><title>Story {i}</title><script>{'x' * 2000}</script></head>"
+            f"<body><nav><ul>{nav}</ul></nav><article><h1>Story {i}</h1>{paras}</article>"
+            "<footer><p>footer</p></footer></body></html>"
+        )
+
+    def completion(self, body):
+        content = filler(self.args.completion_chars, len(json.dumps(body)))
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            content = json.dumps({"summary": content[:200], "body": content}, ensure_ascii=False)
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stand-in"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    def notion_page(self, page):
+        return {
+            "object": "page",
+            "id": page["id"],
+            "created_time": page["created_time"],
+            "last_edited_time": page["last_edited_time"],
+            "archived": False,
+            "properties": {
+                "Name": {"type": "title", "title": [{"plain_text": page["title"], "text": {"content": page["title"]}}]},
+                "URL": {"type": "url", "url": page["url"]},
+            },
+        }
+
+    def notion_query(self, body):
+        with self.lock:
+            pages = list(self.pages)
+        flt = body.get("filter") or {}
+        if flt.get("property") == "URL":
+            pages = [p for p in pages if p["url"] == flt.get("url", {}).get("equals")]
+        elif flt.get("timestamp") == "last_edited_time":
+            since = flt.get("last_edited_time", {}).get("on_or_after", "")
+            pages = [p for p in pages if p["last_edited_time"] >= since[:19]]
+        start = int(body.get("start_cursor") or 0)
+        size = int(body.get("page_size") or 100)
+        chunk = pages[start:start + size]
+        more = start + size < len(pages)
+        return {
+            "object": "list",
+            "results": [self.notion_page(p) for p in chunk],
+            "has_more": more,
+            "next_cursor": str(start + size) if more else None,
+        }
+
+    def notion_create(self, body):
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+        props = body.get("properties") or {}
+        title = "".join(t.get("text", {}).get("content", "") for t in props.get("Name", {}).get("title", []))
+        page = {
+            "id": str(uuid.uuid4()),
+            "title": title,
+            "url": (props.get("URL") or {}).get("url"),
+            "created_time": now,
+            "last_edited_time": now,
+        }
+        with self.lock:
+            self.pages.append(page)
+            self.blocks[page["id"]] = list(body.get("children") or [])
+        return self.notion_page(page)
+
+    # --- HTTP -----------------------------------------------------------
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _service(self):
+                path = self.path.split("?", 1)[0]
+                if path.startswith("/v1/chat/"):
+                    return "openai"
+                if path.startswith("/v1/"):
+                    return "notion"
+                if path.startswith("/article/"):
+                    return "article"
+                if path.startswith("/rss"):
+                    return "feed"
+                return "scrape"
+
+            def _body(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    return json.loads(raw or b"{}")
+                except ValueError:
+                    return {}
+
+            def _send(self, service, status, payload, content_type, extra_headers=None):
+                data = payload if isinstance(payload, bytes) else payload.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (extra_headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+                with standin.lock:
+                    standin.stats[service]["bytes"] += len(data)
+
+            def _handle(self, method):
+                service = self._service()
+                started = time.perf_counter()
+                body = self._body() if method in ("POST", "PATCH") else {}
+                delay = standin.latency[service] * (1 + standin.args.jitter * (standin.rng.random() * 2 - 1))
+                time.sleep(max(0.0, delay))
+                with standin.lock:
+                    standin.stats[service]["requests"] += 1
+                    throttled = standin.rng.random() < standin.rate_429[service]
+                    if throttled:
+                        standin.stats[service]["429"] += 1
+                try:
+                    if throttled:
+                        err = {"object": "error", "status": 429, "code": "rate_limited", "message": "stand-in rate limit"}
+                        if service == "openai":
+                            err = {"error": {"message": "stand-in rate limit", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}
+                        self._send(service, 429, json.dumps(err), "application/json", {"Retry-After": str(standin.args.retry_after)})
+                    else:
+                        self._route(service, method, body)
+                finally:
+                    with standin.lock:
+                        standin.stats[service]["busy"] += time.perf_counter() - started
+
+            def _route(self, service, method, body):
+                path = self.path.split("?", 1)[0]
+                if service == "feed":
+                    if standin.args.scrape:
+                        self._send(service, 403, "forbidden", "text/plain")
+                    else:
+                        self._send(service, 200, standin.feed(), "application/atom+xml; charset=utf-8")
+                elif service == "scrape":
+                    m = re.search(r"[?&]page=(\d+)", self.path)
+                    self._send(service, 200, standin.listing(int(m.group(1)) if m else 1), "text/html; charset=utf-8")
+                elif service == "article":
+                    m = re.match(r"/article/(\d+)", path)
+                    self._send(service, 200, standin.article(int(m.group(1)) if m else 0), "text/html; charset=utf-8")
+                elif service == "openai":
+                    self._send(service, 200, json.dumps(standin.completion(body), ensure_ascii=False), "application/json")
+                else:
+                    self._notion(method, path, body)
+
+            def _notion(self, method, path, body):
+                if method == "POST" and re.match(r"/v1/databases/[^/]+/query$", path):
+                    payload = standin.notion_query(body)
+                elif method == "POST" and path == "/v1/pages":
+                    payload = standin.notion_create(body)
+                elif re.match(r"/v1/blocks/[^/]+/children$", path):
+                    block_id = path.split("/")[3]
+                    with standin.lock:
+                        children = standin.blocks.setdefault(block_id, [])
+                        if method == "PATCH":
+                            children.extend(body.get("children") or [])
+                        payload = {"object": "list", "results": list(children), "has_more": False, "next_cursor": None}
+                else:
+                    self._send("notion", 404, json.dumps({"object": "error", "status": 404, "code": "object_not_found", "message": path}), "application/json")
+                    return
+                self._send("notion", 200, json.dumps(payload, ensure_ascii=False), "application/json")
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_PATCH(self):
+                self._handle("PATCH")
+
+        return Handler
+
+
+def reset_process_state(gn):
+    # Module-level singletons would otherwise carry caches and limiters across runs
+    for name in ("_llm_cache_instance", "_article_cache_instance", "_notion_instance", "_openai_instance", "_http_instance", "_item_store_instance", "_llm_batch_queue_instance"):
+        if hasattr(gn, name):
+            setattr(gn, name, None)
+    for name in ("_limiters", "_windows"):
+        if hasattr(gn, name):
+            getattr(gn, name).clear()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--latency", default="",
+                        help=f"per-service latency in seconds (defaults: {DEFAULT_LATENCY})")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter (0.2 = ±20%%)")
+    parser.add_argument("--rate-429", default="", help="per-service probability of a 429, e.g. notion=0.05")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--article-kb", type=float, default=40)
+    parser.add_argument("--completion-chars", type=int, default=600)
+    parser.add_argument("--scrape", action="store_true", help="serve 403 on the feed to exercise the HTML fallback")
+    parser.add_argument("--warm", action="store_true", help="keep the state directory between runs")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("-v", "--verbose", action="store_true", help="show the importer's own output")
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    standin = StandIn(args)
+    standin.start()
+    state_root = tempfile.mkdtemp(prefix="bench-replay-")
+    os.environ.update(
+        FEED_URL=f"{standin.base}/rss",
+        SCRAPE_BASE_URL=standin.base,
+        NOTION_BASE_URL=standin.base,
+        NOTION_TOKEN="secret_bench",
+        NOTION_DATABASE_ID="0" * 32,
+        OPENAI_BASE_URL=f"{standin.base}/v1",
+        OPENAI_API_KEY="sk-bench",
+        MAX_ITEMS=str(args.items),
+        BACKFILL_EXISTING="false",
+    )
+
+    import geeknews_to_notion as gn
+
+    report = {"items": args.items, "runs": []}
+    for run in range(1, args.runs + 1):
+        if not args.warm or run == 1:
+            os.environ["STATE_DIR"] = os.path.join(state_root, f"run{run}")
+            standin.reset_notion()
+            reset_process_state(gn)
+        standin.reset_stats()
+        out = io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else out):
+            try:
+                gn.main()
+            except SystemExit as e:
+                print(f"[bench] importer exited: {e.code}", file=sys.stderr)
+        elapsed = time.perf_counter() - started
+        created = len(standin.pages)
+        services = {}
+        for name, st in standin.stats.items():
+            if not st["requests"]:
+                continue
+            services[name] = {
+                "requests": st["requests"],
+                "429": st["429"],
+                "bytes": st["bytes"],
+                "req_per_s": st["requests"] / elapsed if elapsed else 0.0,
+                "avg_ms": st["busy"] / st["requests"] * 1000,
+            }
+        stages = {}
+        metrics_path = os.path.join(os.environ["STATE_DIR"], "run_metrics.json")
+        if os.path.exists(metrics_path):
+            with open(metrics_path, encoding="utf-8") as f:
+                stages = json.load(f).get("stages", {})
+        report["runs"].append({"run": run, "seconds": elapsed, "pages": created, "services": services, "stages": stages})
+
+        print(f"run {run}: {elapsed:.2f}s end-to-end, {created} pages in stand-in Notion "
+              f"({args.items / elapsed if elapsed else 0:.2f} items/s)")
+        print(f"  {'service':<8} {'requests':>8} {'429s':>5} {'KiB out':>9} {'req/s':>7} {'avg ms':>8}")
+        for name, st in services.items():
+            print(f"  {name:<8} {st['requests']:>8} {st['429']:>5} {st['bytes'] / 1024:>9.1f} "
+                  f"{st['req_per_s']:>7.2f} {st['avg_ms']:>8.1f}")
+        if stages:
+            print(f"  {'stage':<24} {'calls':>6} {'total s':>8} {'p50 ms':>8} {'p95 ms':>8} {'hits':>5} {'errors':>6}")
+            for name, st in sorted(stages.items(), key=lambda kv: -kv[1]["seconds"]):
+                print(f"  {name:<24} {st['calls']:>6} {st['seconds']:>8.2f} {st['p50_ms']:>8.1f} "
+                      f"{st['p95_ms']:>8.1f} {st['cache_hits']:>5} {st['errors']:>6}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import geeknews_to_notion as g
+
+HTML = "<html><body><nav>menu</nav><article>" + "".join(
+    f"<p>Paragraph {i} talks about caching, extraction and how long texts are summarized.</p>" for i in range(600)
+) + "</article></body></html>"
+
+
+class Response:
+    def __init__(self, text, status=200, headers=None):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = status
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+
+def _setup(monkeypatch, tmp_path):
+    requests = []
+
+    def fake_get(url, headers=None, **kwargs):
+        requests.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return Response("", 304)
+        return Response(HTML, headers={"ETag": '"v1"'})
+
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("ARTICLE_CACHE_TTL_HOURS", "0")
+    monkeypatch.setenv("ARTICLE_EXTRACTOR", "fast")
+    monkeypatch.delenv("SUMMARY_STRATEGY", raising=False)
+    monkeypatch.setattr(g, "_article_cache_instance", None)
+    monkeypatch.setattr(g, "http_get", fake_get)
+    return requests
+
+
+def test_text_cap_change_re_extracts(monkeypatch, tmp_path):
+    requests = _setup(monkeypatch, tmp_path)
+    short = g.fetch_main_text("https://example.com/post")
+    assert len(short) == 8000
+    assert len(g.fetch_main_text("https://example.com/post")) == 8000
+    assert requests[-1].get("If-None-Match") == '"v1"'
+
+    monkeypatch.setenv("SUMMARY_STRATEGY", "mapreduce")
+    long_text = g.fetch_main_text("https://example.com/post")
+    assert len(long_text) > 8000
+    # No validators: a 304 would leave nothing to extract the longer text from
+    assert "If-None-Match" not in requests[-1]
+    assert g.fetch_main_text("https://example.com/post") == long_text
+
+
+def test_extractor_change_re_extracts(monkeypatch, tmp_path):
+    requests = _setup(monkeypatch, tmp_path)
+    g.fetch_main_text("https://example.com/post")
+    monkeypatch.setenv("ARTICLE_EXTRACTOR", "soup")
+    g.fetch_main_text("https://example.com/post")
+    assert "If-None-Match" not in requests[-1]
+    row = g._article_cache().get(g.ArticleCache.normalize("https://example.com/post"))
+    assert row["variant"] == "soup:8000"
@@ -0,0 +1,30 @@
+import time
+
+import geeknews_to_notion as g
+
+
+def _entry(i):
+    return {"id": f"tag:{i}", "link": f"https://example.com/{i}", "published_parsed": time.gmtime(1_700_000_000 + i * 3600)}
+
+
+def test_capped_watermark_leaves_cut_entries_for_next_run():
+    prior = {"newest_id": "tag:0", "newest_published": g.isoformat(time.gmtime(1_700_000_000))}
+    entries = [_entry(i) for i in range(10, 0, -1)]
+    fresh, full = g._entries_after_watermark(entries, prior)
+    assert [e["id"] for e in fresh] == [f"tag:{i}" for i in range(10, 0, -1)]
+    assert full["newest_id"] == "tag:10"
+
+    # Only the 4 oldest entries fit; the watermark must stop at the newest of them
+    kept = fresh[-4:]
+    watermark = g._capped_watermark(kept, prior, {"etag": '"v1"', **full})
+    assert watermark["newest_id"] == "tag:4"
+    assert "etag" not in watermark
+
+    fresh, _ = g._entries_after_watermark(entries, {**prior, **watermark})
+    assert [e["id"] for e in fresh] == [f"tag:{i}" for i in range(10, 4, -1)]
+
+
+def test_capped_watermark_for_scraped_topics():
+    kept = [{"link": "https://a/2", "topic": "https://news.hada.io/topic?id=52"},
+            {"link": "https://a/1", "topic": "https://news.hada.io/topic?id=51"}]
+    assert g._capped_watermark(kept, {"scrape_topic_id": 50}, {"scrape_topic_id": 90}) == {"scrape_topic_id": 52}
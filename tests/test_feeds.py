@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+import geeknews_to_notion as g
+
+
+@pytest.mark.parametrize(
+    "url, title, expected",
+    [
+        ("https://news.hada.io/rss", "anything", "GeekNews"),
+        ("https://blog.example.com/feed", "Foo, Bar & Baz", "Foo Bar & Baz"),
+        ("https://blog.example.com/feed", "  Spaced   out  ", "Spaced out"),
+        ("https://blog.example.com/feed", "x" * 150, "x" * 100),
+        ("https://blog.example.com/feed", ",,,", "blog.example.com"),
+        ("https://www.example.org/feed", None, "example.org"),
+    ],
+)
+def test_feed_label(url, title, expected):
+    assert g._feed_label(url, title) == expected
+
+
+@pytest.fixture
+def feeds_file(tmp_path, monkeypatch):
+    def write(content):
+        path = tmp_path / "feeds.json"
+        path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+        monkeypatch.setenv("FEEDS_FILE", str(path))
+
+    monkeypatch.setenv("FEED_URL", "https://fallback.example/rss")
+    return write
+
+
+@pytest.mark.parametrize(
+    "content",
+    [{"url": "https://lobste.rs/rss"}, [1], [{"url": ["x"]}], "[]", "{not json", '"https://lobste.rs/rss"'],
+)
+def test_bad_feeds_file_falls_back_to_feed_url(feeds_file, content):
+    feeds_file(content)
+    assert [f["url"] for f in g._feed_configs()] == ["https://fallback.example/rss"]
+
+
+def test_feeds_file_keeps_valid_entries(feeds_file, capsys):
+    feeds_file([
+        "https://a.example/rss",
+        {"url": "https://b.example/rss", "label": "Foo, Bar"},
+        {"url": "https://c.example/rss", "label": 5},
+        {"label": "no url"},
+        "https://a.example/rss",
+    ])
+    feeds = g._feed_configs()
+    assert [(f["url"], f["label"]) for f in feeds] == [
+        ("https://a.example/rss", None),
+        ("https://b.example/rss", "Foo Bar"),
+        ("https://c.example/rss", None),
+    ]
+    assert "no url" in capsys.readouterr().out
+
+
+def test_feed_url_labels_are_cleaned(monkeypatch):
+    monkeypatch.delenv("FEEDS_FILE", raising=False)
+    monkeypatch.setenv("FEED_URL", "Tech & Stuff=https://a.example/rss\nhttps://b.example/rss")
+    assert [(f["url"], f["label"]) for f in g._feed_configs()] == [
+        ("https://a.example/rss", "Tech & Stuff"),
+        ("https://b.example/rss", None),
+    ]
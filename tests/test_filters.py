@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+import geeknews_to_notion as g
+
+
+@pytest.fixture
+def filters_file(tmp_path, monkeypatch):
+    def write(content):
+        path = tmp_path / "filters.json"
+        path.write_text(content if isinstance(content, str) else json.dumps(content), encoding="utf-8")
+        monkeypatch.setenv("FILTERS_FILE", str(path))
+
+    for name in ("INCLUDE_KEYWORDS", "ALLOW_DOMAINS", "DENY_DOMAINS", "MIN_POINTS"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("EXCLUDE_KEYWORDS", "crypto")
+    return write
+
+
+def _entry(title, link="https://example.com/a", points=None):
+    return {"title": title, "summary": "", "link": link, "points": points}
+
+
+@pytest.mark.parametrize("content", ["[1, 2]", '"rules"', "42", "null", "{not json"])
+def test_bad_file_falls_back_to_env_filters(filters_file, content, capsys):
+    filters_file(content)
+    engine = g.FilterEngine()
+    assert engine.check(_entry("crypto news"), "GeekNews") is not None
+    assert engine.check(_entry("python news"), "GeekNews") is None
+    assert "[warn] FILTERS_FILE" in capsys.readouterr().out
+
+
+def test_non_object_source_rules_are_ignored(filters_file, capsys):
+    filters_file({"*": ["oops"], "Lobsters": "rust", "Hacker News": {"min_points": 10}, "GeekNews": None})
+    engine = g.FilterEngine()
+    assert engine.check(_entry("rust news"), "Lobsters") is None
+    assert engine.check(_entry("crypto news"), "Lobsters") is not None
+    assert engine.check(_entry("python", points=3), "Hacker News") is not None
+    assert engine.check(_entry("python", points=30), "Hacker News") is None
+    out = capsys.readouterr().out
+    assert "'*'" in out and "'Lobsters'" in out
+
+
+def test_scalar_rule_values_are_accepted(filters_file):
+    filters_file({"GeekNews": {"exclude": 5, "deny_domains": "spam.example"}})
+    engine = g.FilterEngine()
+    assert engine.check(_entry("5 tips"), "GeekNews") is not None
+    assert engine.check(_entry("ok", link="https://spam.example/x"), "GeekNews") is not None
+    assert engine.check(_entry("ok"), "GeekNews") is None
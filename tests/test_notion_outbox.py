@@ -0,0 +1,108 @@
+import time
+
+import httpx
+import pytest
+from notion_client.errors import APIErrorCode, APIResponseError
+
+import geeknews_to_notion as g
+
+
+def _error(status, code, headers=None):
+    response = httpx.Response(status, headers=headers or {}, request=httpx.Request("POST", "https://api.notion.com/v1/pages"))
+    return APIResponseError(response, f"HTTP {status}", code)
+
+
+class FakeNotion:
+    # pages.create runs the scripted outcomes in order ("ok", an exception to raise, or
+    # ("landed", exception) for a create that is applied but still reports an error);
+    # databases.query answers the URL filter from the pages created so far
+    def __init__(self, outcomes=()):
+        self.outcomes = list(outcomes)
+        self.pages = self
+        self.databases = self
+        self.created = []
+        self.create_calls = 0
+
+    def create(self, parent, properties, children=None):
+        self.create_calls += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if isinstance(outcome, Exception):
+            raise outcome
+        page = {"id": f"page-{len(self.created) + 1}", "url": properties["URL"]["url"]}
+        self.created.append(page)
+        if isinstance(outcome, tuple):
+            raise outcome[1]
+        return {"id": page["id"]}
+
+    def query(self, database_id, filter=None, **kwargs):
+        url = filter["url"]["equals"]
+        return {"results": [{"id": p["id"]} for p in self.created if p["url"] == url], "has_more": False}
+
+
+def _payload(url):
+    return {
+        "parent": {"database_id": "db"},
+        "properties": {"Name": {"title": [{"text": {"content": "Story"}}]}, "URL": {"url": url}},
+    }
+
+
+@pytest.fixture(autouse=True)
+def _state(monkeypatch, tmp_path):
+    monkeypatch.setenv("STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("NOTION_RPS", "1000")
+    monkeypatch.setenv("NOTION_MAX_RETRIES", "2")
+    monkeypatch.setattr(g, "_limiters", {})
+    monkeypatch.setattr(g, "_windows", {})
+    monkeypatch.setattr(g, "_item_store_instance", None)
+
+
+def test_landed_create_is_not_sent_twice(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(g.time, "sleep", sleeps.append)
+    notion = FakeNotion([("landed", _error(502, APIErrorCode.InternalServerError))])
+    page = g.send_page(notion, _payload("https://example.com/a"))
+    assert page == {"id": "page-1"}
+    assert notion.create_calls == 1
+    assert len(sleeps) == 1
+
+
+def test_rate_limit_waits_for_retry_after():
+    notion = FakeNotion([_error(429, APIErrorCode.RateLimited, {"Retry-After": "0.3"})])
+    started = time.monotonic()
+    page = g.send_page(notion, _payload("https://example.com/a"))
+    assert page == {"id": "page-1"}
+    assert notion.create_calls == 2
+    assert time.monotonic() - started >= 0.3
+    assert g._adaptive_window("notion").window < g._adaptive_window("notion").max_window
+
+
+def test_validation_error_marks_row_dead(tmp_path):
+    outbox = g.NotionOutbox(str(tmp_path / "outbox.sqlite"), max_attempts=10)
+    url = "https://example.com/a"
+    row_id = outbox.put(url, _payload(url))
+    notion = FakeNotion([_error(400, APIErrorCode.ValidationError)])
+    with pytest.raises(APIResponseError) as e:
+        g.send_page(notion, _payload(url))
+    assert notion.create_calls == 1
+    assert outbox.failed(row_id, e.value) is False
+    assert outbox.dead_count() == 1
+    assert outbox.pending() == []
+    assert outbox.dead_urls() == [url]
+
+
+def test_flush_redelivers_pending_rows(tmp_path):
+    outbox = g.NotionOutbox(str(tmp_path / "outbox.sqlite"), max_attempts=10)
+    urls = ["https://example.com/a", "https://example.com/b"]
+    for url in urls:
+        outbox.put(url, _payload(url), {"record": {"points": 3}})
+    notion = FakeNotion()
+    # One page was already created by the run that queued it
+    notion.created.append({"id": "page-0", "url": urls[0]})
+    written = g.flush_outbox(notion, "db", outbox, None)
+    assert written == [urls[1]]
+    assert notion.create_calls == 1
+    assert outbox.pending() == []
+    assert outbox.dead_count() == 0
+    store = g._item_store()
+    assert store.page_id(urls[0]) == "page-0"
+    assert store.page_id(urls[1]) == "page-2"
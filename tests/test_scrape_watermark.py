@@ -0,0 +1,101 @@
+import re
+
+import pytest
+
+import geeknews_to_notion as g
+
+PAGE_SIZE = 30
+
+
+def _rows(top: int):
+    return [
+        {"title": f"T{i}", "link": f"https://example.com/{i}", "topic_id": i, "snippet": None, "topic": None, "points": None}
+        for i in range(top, max(0, top - PAGE_SIZE), -1)
+    ]
+
+
+@pytest.fixture
+def listing(monkeypatch):
+    # Newest topic is 190; /new?page=N holds PAGE_SIZE topics each. Pages in `failing` error out.
+    calls = {"pages": [], "failing": set(), "top": 190}
+
+    def fake_scrape_listing(url):
+        match = re.search(r"page=(\d+)", url)
+        page = int(match.group(1)) if match else 1
+        calls["pages"].append(page)
+        if page in calls["failing"]:
+            return None
+        return _rows(calls["top"] - (page - 1) * PAGE_SIZE)
+
+    monkeypatch.setattr(g, "scrape_listing", fake_scrape_listing)
+    monkeypatch.setenv("MAX_ITEMS", "200")
+    monkeypatch.setenv("SCRAPE_MAX_PAGES", "10")
+    monkeypatch.setenv("SCRAPE_CONCURRENCY", "4")
+    return calls
+
+
+def _titles(items):
+    return [int(it["title"][1:]) for it in items]
+
+
+def test_full_walk_advances_watermark(listing):
+    items, watermark = g._scrape_items({"scrape_topic_id": 100})
+    assert _titles(items) == list(range(190, 100, -1))
+    assert watermark == 190
+
+
+def test_failed_page_keeps_watermark(listing):
+    listing["failing"] = {3}
+    items, watermark = g._scrape_items({"scrape_topic_id": 100})
+    # Topics 101-130 sit on the failed page: the watermark must not move past them
+    assert watermark == 100
+    assert _titles(items) == list(range(190, 130, -1))
+
+    listing["failing"] = set()
+    items, watermark = g._scrape_items({"scrape_topic_id": watermark})
+    assert set(range(101, 131)) <= set(_titles(items))
+    assert watermark == 190
+
+
+def test_failed_first_page_returns_nothing(listing):
+    listing["failing"] = {1}
+    items, watermark = g._scrape_items({"scrape_topic_id": 100})
+    assert items == []
+    assert watermark == 100
+
+
+def test_rows_after_failed_page_are_not_used(listing):
+    # Page 2 fails while pages 3-5 of the same wave succeed; only page 1 is contiguous
+    listing["failing"] = {2}
+    items, watermark = g._scrape_items({"scrape_topic_id": 10})
+    assert _titles(items) == list(range(190, 160, -1))
+    assert watermark == 10
+
+
+def test_empty_page_ends_listing(listing):
+    listing["top"] = 40
+    items, watermark = g._scrape_items({"scrape_topic_id": 5})
+    assert _titles(items) == list(range(40, 5, -1))
+    assert watermark == 40
+
+
+def test_max_items_takes_oldest_first(listing, monkeypatch):
+    monkeypatch.setenv("MAX_ITEMS", "25")
+    items, watermark = g._scrape_items({"scrape_topic_id": 100})
+    assert _titles(items) == list(range(125, 100, -1))
+    assert watermark == 125
+
+
+def test_page_limit_skips_older_topics(listing, monkeypatch):
+    # Documented: SCRAPE_MAX_PAGES bounds the catch-up and the gap below it is skipped
+    monkeypatch.setenv("SCRAPE_MAX_PAGES", "2")
+    items, watermark = g._scrape_items({"scrape_topic_id": 10})
+    assert _titles(items) == list(range(190, 130, -1))
+    assert watermark == 190
+
+
+def test_no_watermark_reads_first_page_only(listing):
+    items, watermark = g._scrape_items({})
+    assert listing["pages"] == [1]
+    assert watermark == 190
+    assert len(items) == PAGE_SIZE
@@ -0,0 +1,73 @@
+import pytest
+
+import geeknews_to_notion as g
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://example.com/a?utm_source=hn&utm_medium=rss", "https://example.com/a"),
+        ("https://example.com/a?id=3&fbclid=xyz#section", "https://example.com/a?id=3"),
+        ("https://example.com/a?UTM_Campaign=x&page=2", "https://example.com/a?page=2"),
+        # Bare keys and the original encoding of kept parameters survive
+        ("https://example.com/a?foo", "https://example.com/a?foo"),
+        ("https://example.com/a?foo&utm_source=x&bar=", "https://example.com/a?foo&bar="),
+        ("https://example.com/s?q=a%2Fb+c", "https://example.com/s?q=a%2Fb+c"),
+        # `ref` and `si` only count as tracking on hosts that use them that way
+        ("https://github.com/o/r/archive?ref=v1.2", "https://github.com/o/r/archive?ref=v1.2"),
+        ("https://www.producthunt.com/posts/x?ref=home", "https://www.producthunt.com/posts/x"),
+        ("https://docs.example.org/api?si=3", "https://docs.example.org/api?si=3"),
+        ("https://youtu.be/abc?si=TRACK&t=30", "https://youtu.be/abc?t=30"),
+        ("https://m.youtube.com/watch?v=abc&feature=share", "https://m.youtube.com/watch?v=abc"),
+        # Redirect wrappers are unwrapped before cleaning
+        ("https://www.google.com/url?q=https%3A%2F%2Fexample.com%2Fa%3Futm_source%3Dx&sa=D", "https://example.com/a"),
+        ("https://l.facebook.com/l.php?u=https%3A%2F%2Fexample.com%2Fb&h=AT", "https://example.com/b"),
+        ("https://href.li/?https://example.com/c", "https://example.com/c"),
+        ("https://www.google.com/search?q=python", "https://www.google.com/search?q=python"),
+        ("  https://example.com/a  ", "https://example.com/a"),
+        ("", ""),
+    ],
+)
+def test_clean_url(url, expected):
+    assert g.clean_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("http://www.Example.com/a/", "https://example.com/a"),
+        ("https://example.com:443/a", "https://example.com/a"),
+        ("http://example.com:80/a", "https://example.com/a"),
+        ("https://example.com:8443/a", "https://example.com:8443/a"),
+        ("https://example.com./a", "https://example.com/a"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/a?b=2&a=1&utm_source=x#top", "https://example.com/a?a=1&b=2"),
+        ("https://example.com/", "https://example.com"),
+        # `?foo` stays a bare key instead of becoming `foo=`
+        ("https://example.com/a?foo", "https://example.com/a?foo"),
+        ("https://example.com/a?foo=", "https://example.com/a?foo="),
+        ("https://example.com/a?x=1&foo&x", "https://example.com/a?foo&x&x=1"),
+        # Equivalent encodings give the same key
+        ("https://example.com/s?q=a%20b", "https://example.com/s?q=a+b"),
+        ("https://example.com/s?q=a+b", "https://example.com/s?q=a+b"),
+        ("ftp://Example.com/f", "ftp://example.com/f"),
+    ],
+)
+def test_canonicalize_url(url, expected):
+    assert g.canonicalize_url(url) == expected
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("https://www.example.com/a/?utm_source=x", "http://example.com/a"),
+        ("https://example.com/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+        ("https://l.facebook.com/l.php?u=https%3A%2F%2Fexample.com%2Fa", "https://example.com/a/"),
+    ],
+)
+def test_canonical_keys_match(a, b):
+    assert g.canonicalize_url(a) == g.canonicalize_url(b)
+
+
+def test_bare_key_differs_from_missing_query():
+    assert g.canonicalize_url("https://example.com/a?print") != g.canonicalize_url("https://example.com/a")